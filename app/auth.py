@@ -1,11 +1,20 @@
 from google_auth_oauthlib.flow import Flow
 from google.oauth2.credentials import Credentials
-from googleapiclient.discovery import build
-from fastapi import HTTPException, Request
+from google.auth.transport.requests import Request as GoogleAuthRequest
+from fastapi import HTTPException, Request, Depends
+from pymongo import IndexModel
 from app.config import settings
-from app.database import get_database
-from datetime import datetime
+from app.database import get_database, register_indexes
+from app.services.google_api import build_service
+from app.sessions import decode_session_token, revocation_cache
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Optional
+import asyncio
 import json
+import time
+
+register_indexes("authenticated_users", IndexModel("email", unique=True))
 
 SCOPES = [
     'openid',
@@ -35,13 +44,14 @@ def create_flow():
 
 
 async def get_user_info(credentials: Credentials):
-    service = build('oauth2', 'v2', credentials=credentials)
+    service = build_service('oauth2', 'v2', credentials)
     user_info = service.userinfo().get().execute()
     return user_info
 
 
 async def save_authenticated_user(email: str, name: str, profile_pic: str,
-                                   access_token: str, refresh_token: str):
+                                   access_token: str, refresh_token: str,
+                                   token_expiry: Optional[datetime] = None):
     db = get_database()
 
     user_data = {
@@ -50,6 +60,7 @@ async def save_authenticated_user(email: str, name: str, profile_pic: str,
         "profile_pic": profile_pic,
         "access_token": access_token,
         "refresh_token": refresh_token,
+        "token_expiry": token_expiry,
         "created_at": datetime.utcnow(),
         "updated_at": datetime.utcnow()
     }
@@ -60,6 +71,8 @@ async def save_authenticated_user(email: str, name: str, profile_pic: str,
         upsert=True
     )
 
+    credentials_cache.invalidate(email)
+
 
 async def get_authenticated_user(email: str):
     db = get_database()
@@ -67,25 +80,124 @@ async def get_authenticated_user(email: str):
     return user
 
 
-async def get_user_credentials(email: str) -> Credentials:
-    user = await get_authenticated_user(email)
-
-    if not user:
-        raise HTTPException(status_code=401, detail="User not authenticated")
-
-    if not user.get("access_token"):
-        raise HTTPException(status_code=401, detail="No access token found")
-
-    credentials = Credentials(
+def build_credentials(user: dict) -> Credentials:
+    return Credentials(
         token=user["access_token"],
         refresh_token=user.get("refresh_token"),
         token_uri="https://oauth2.googleapis.com/token",
         client_id=settings.google_client_id,
         client_secret=settings.google_client_secret,
-        scopes=SCOPES
+        scopes=SCOPES,
+        expiry=user.get("token_expiry")
     )
 
-    return credentials
+
+class CredentialsCache:
+    def __init__(self, refresh_margin_seconds: int, max_size: int, ttl_seconds: float):
+        self.refresh_margin = timedelta(seconds=refresh_margin_seconds)
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._entries: OrderedDict = OrderedDict()
+        self._refreshing: dict = {}
+
+    async def get(self, email: str) -> Credentials:
+        entry = self._cached(email)
+
+        if entry is None:
+            user = await get_authenticated_user(email)
+
+            if not user:
+                raise HTTPException(status_code=401, detail="User not authenticated")
+
+            if not user.get("access_token"):
+                raise HTTPException(status_code=401, detail="No access token found")
+
+            entry = self._store(email, build_credentials(user))
+
+        credentials = entry["credentials"]
+        if self.needs_refresh(credentials):
+            await self.refresh(email, credentials)
+        elif credentials.token != entry["persisted_token"]:
+            await self.persist(email, credentials)
+
+        return credentials
+
+    def _cached(self, email: str) -> Optional[dict]:
+        entry = self._entries.get(email)
+        if entry is None:
+            return None
+
+        if time.monotonic() - entry["cached_at"] > self.ttl_seconds:
+            del self._entries[email]
+            return None
+
+        self._entries.move_to_end(email)
+        return entry
+
+    def _store(self, email: str, credentials: Credentials) -> dict:
+        entry = {"credentials": credentials, "persisted_token": credentials.token, "cached_at": time.monotonic()}
+        self._entries[email] = entry
+        self._entries.move_to_end(email)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+        return entry
+
+    def needs_refresh(self, credentials: Credentials) -> bool:
+        if not credentials.refresh_token or credentials.expiry is None:
+            return False
+        return credentials.expiry - self.refresh_margin <= datetime.utcnow()
+
+    async def refresh(self, email: str, credentials: Credentials):
+        task = self._refreshing.get(email)
+        if task is None:
+            task = asyncio.ensure_future(self._refresh(email, credentials))
+            self._refreshing[email] = task
+            task.add_done_callback(lambda _: self._refreshing.pop(email, None))
+        await asyncio.shield(task)
+
+    async def _refresh(self, email: str, credentials: Credentials):
+        loop = asyncio.get_running_loop()
+        try:
+            await loop.run_in_executor(None, credentials.refresh, GoogleAuthRequest())
+        except Exception as e:
+            self.invalidate(email)
+            raise HTTPException(status_code=401, detail=f"Failed to refresh Google credentials: {str(e)}")
+
+        await self.persist(email, credentials)
+
+    async def persist(self, email: str, credentials: Credentials):
+        db = get_database()
+        await db.authenticated_users.update_one(
+            {"email": email, "refresh_token": credentials.refresh_token},
+            {"$set": {
+                "access_token": credentials.token,
+                "token_expiry": credentials.expiry,
+                "updated_at": datetime.utcnow()
+            }}
+        )
+        entry = self._entries.get(email)
+        if entry is not None and entry["credentials"] is credentials:
+            entry["persisted_token"] = credentials.token
+
+    def invalidate(self, email: str):
+        self._entries.pop(email, None)
+
+    def clear(self):
+        self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+credentials_cache = CredentialsCache(
+    refresh_margin_seconds=settings.credentials_refresh_margin_seconds,
+    max_size=settings.credentials_cache_size,
+    ttl_seconds=settings.credentials_cache_ttl_seconds
+)
+
+
+async def get_user_credentials(email: str) -> Credentials:
+    return await credentials_cache.get(email)
 
 
 async def get_current_user(request: Request):
@@ -94,11 +206,37 @@ async def get_current_user(request: Request):
     if not auth_header or not auth_header.startswith("Bearer "):
         raise HTTPException(status_code=401, detail="Missing or invalid authorization header")
 
-    email = auth_header.replace("Bearer ", "")
+    token = auth_header.replace("Bearer ", "")
+
+    claims = decode_session_token(token)
+    if claims:
+        if settings.session_revocation_enabled and await revocation_cache.is_revoked(claims["jti"]):
+            raise HTTPException(status_code=401, detail="Session has been revoked")
+
+        return {
+            "email": claims["sub"],
+            "name": claims.get("name"),
+            "session": claims
+        }
+
+    if not settings.legacy_email_tokens or "@" not in token:
+        raise HTTPException(status_code=401, detail="Invalid or expired session token")
 
-    user = await get_authenticated_user(email)
+    user = await get_authenticated_user(token)
 
     if not user:
         raise HTTPException(status_code=401, detail="User not found")
 
     return user
+
+
+def is_admin_email(email: str) -> bool:
+    admin_emails = {admin.strip().lower() for admin in settings.admin_emails.split(",") if admin.strip()}
+    return email.lower() in admin_emails
+
+
+async def require_admin(current_user: dict = Depends(get_current_user)):
+    if not is_admin_email(current_user["email"]):
+        raise HTTPException(status_code=403, detail="Admin access required")
+
+    return current_user
@@ -1,4 +1,5 @@
 from pydantic_settings import BaseSettings
+from typing import Optional
 
 
 class Settings(BaseSettings):
@@ -7,6 +8,48 @@ class Settings(BaseSettings):
     google_client_secret: str
     oauth_redirect_url: str
     secret_key: str
+    admin_emails: str = ""
+    metrics_enabled: bool = True
+    profiling_enabled: bool = False
+    profiling_sample_rate: float = 0.0
+    profiling_max_bytes: int = 50 * 1024 * 1024
+    session_ttl_seconds: int = 86400
+    session_revocation_enabled: bool = True
+    session_revocation_refresh_seconds: float = 30.0
+    legacy_email_tokens: bool = False
+    sheets_max_workers: int = 8
+    sheets_api_endpoint: Optional[str] = None
+    sheets_client_pool_size: int = 256
+    sheets_client_ttl_seconds: int = 900
+    sheets_user_read_requests_per_minute: int = 60
+    sheets_user_write_requests_per_minute: int = 60
+    sheets_project_read_requests_per_minute: int = 300
+    sheets_project_write_requests_per_minute: int = 300
+    sheets_quota_instances: int = 1
+    sheets_max_concurrency: int = 8
+    sheets_max_retries: int = 5
+    sheets_backoff_base_seconds: float = 1.0
+    sheets_backoff_max_seconds: float = 32.0
+    credentials_refresh_margin_seconds: int = 300
+    credentials_cache_size: int = 256
+    credentials_cache_ttl_seconds: int = 900
+    bulk_max_items: int = 1000
+    export_batch_size: int = 1000
+    import_batch_size: int = 1000
+    import_max_errors: int = 1000
+    role_stats_reconcile_seconds: int = 3600
+    sync_chunk_size: int = 5000
+    sync_batch_size: int = 1000
+    user_tombstone_ttl_seconds: int = 604800
+    sync_watermark_margin_seconds: float = 60.0
+    live_sync_enabled: bool = False
+    live_sync_debounce_seconds: float = 1.0
+    live_sync_max_batch: int = 1000
+    sync_jobs_enabled: bool = True
+    sync_job_workers: int = 2
+    sync_job_lease_seconds: int = 60
+    sync_job_poll_seconds: float = 2.0
+    sync_job_max_attempts: int = 3
 
     class Config:
         env_file = ".env"
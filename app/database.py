@@ -1,24 +1,150 @@
 from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorDatabase
+from pymongo import IndexModel
+from pymongo.errors import OperationFailure
 from app.config import settings
+from app.metrics import MongoCommandMetrics
 from typing import Optional
+import asyncio
 
 client: Optional[AsyncIOMotorClient] = None
 db: Optional[AsyncIOMotorDatabase] = None
 
+index_registry: dict = {}
+index_task: Optional[asyncio.Task] = None
+
+
+def register_indexes(collection: str, *indexes: IndexModel):
+    registered = index_registry.setdefault(collection, {})
+    for index in indexes:
+        registered[index.document["name"]] = index
+
+
+INDEX_OPTIONS = ("unique", "sparse", "expireAfterSeconds", "partialFilterExpression")
+
+
+def is_constraint(index: IndexModel) -> bool:
+    return bool(index.document.get("unique"))
+
+
+def index_matches(declared: dict, existing: dict) -> bool:
+    if list(dict(declared["key"]).items()) != list(dict(existing["key"]).items()):
+        return False
+
+    for option in INDEX_OPTIONS:
+        if option == "unique":
+            if bool(declared.get(option)) != bool(existing.get(option)):
+                return False
+        elif declared.get(option) != existing.get(option):
+            return False
+
+    collation = declared.get("collation")
+    existing_collation = existing.get("collation") or {"locale": "simple"}
+    if collation:
+        return all(existing_collation.get(key) == value for key, value in collation.items())
+    return existing_collation.get("locale") == "simple"
+
+
+async def ensure_indexes(constraints_only: bool = False) -> dict:
+    created = {}
+    failed = {}
+
+    for collection, indexes in index_registry.items():
+        try:
+            existing = [index async for index in db[collection].list_indexes()]
+            missing = []
+            for name, index in indexes.items():
+                if constraints_only and not is_constraint(index):
+                    continue
+                if any(index_matches(index.document, current) for current in existing):
+                    continue
+                if any(current["name"] == name for current in existing):
+                    raise OperationFailure(f"Index {name} exists with different keys or options")
+                missing.append(index)
+
+            if missing:
+                created[collection] = await db[collection].create_indexes(missing)
+                print(f"Created indexes on {collection}: {', '.join(created[collection])}")
+        except Exception as e:
+            failed[collection] = str(e)
+            print(f"Failed to build indexes on {collection}: {e}")
+
+    return {"created": created, "failed": failed}
+
+
+async def _build_indexes_in_background():
+    await ensure_indexes()
+
+
+async def wait_for_indexes():
+    if index_task:
+        await index_task
+
+
+async def index_usage(collection: str) -> dict:
+    try:
+        stats = await db[collection].aggregate([{"$indexStats": {}}]).to_list(length=None)
+    except (OperationFailure, NotImplementedError):
+        return {}
+    return {stat["name"]: stat["accesses"] for stat in stats}
+
+
+async def index_report() -> dict:
+    collections = set(index_registry) | set(await db.list_collection_names())
+    report = {}
+
+    for collection in sorted(collections):
+        declared = index_registry.get(collection, {})
+        existing = {index["name"]: index async for index in db[collection].list_indexes()}
+        usage = await index_usage(collection)
+
+        indexes = []
+        for name in sorted(set(declared) | set(existing)):
+            keys = existing[name]["key"] if name in existing else declared[name].document["key"]
+            accesses = usage.get(name)
+            indexes.append({
+                "name": name,
+                "keys": dict(keys),
+                "declared": name in declared or name == "_id_",
+                "present": name in existing,
+                "matches": name not in declared or (
+                    name in existing and index_matches(declared[name].document, existing[name])
+                ),
+                "ops": accesses["ops"] if accesses else None,
+                "since": accesses["since"] if accesses else None
+            })
+
+        report[collection] = {
+            "indexes": indexes,
+            "missing": [index["name"] for index in indexes if not index["present"]],
+            "mismatched": [index["name"] for index in indexes if index["present"] and not index["matches"]],
+            "undeclared": [index["name"] for index in indexes if not index["declared"]],
+            "unused": [index["name"] for index in indexes if index["present"] and index["ops"] == 0]
+        }
+
+    return report
+
 
 async def connect_to_mongo():
-    global client, db
-    client = AsyncIOMotorClient(settings.mongodb_uri)
+    global client, db, index_task
+    event_listeners = [MongoCommandMetrics()] if settings.metrics_enabled else []
+    client = AsyncIOMotorClient(settings.mongodb_uri, event_listeners=event_listeners)
     db = client.get_default_database()
 
-    await db.users.create_index("email", unique=True)
-    await db.authenticated_users.create_index("email", unique=True)
+    # Unique indexes enforce invariants the write paths rely on, so they
+    # must exist before the app takes traffic; the rest can build later.
+    result = await ensure_indexes(constraints_only=True)
+    if result["failed"]:
+        raise RuntimeError(f"Failed to build unique indexes: {result['failed']}")
+
+    index_task = asyncio.create_task(_build_indexes_in_background())
 
     print("Connected to MongoDB")
 
 
 async def close_mongo_connection():
     global client
+    if index_task and not index_task.done():
+        index_task.cancel()
     if client:
         client.close()
         print("Closed MongoDB connection")
@@ -0,0 +1,112 @@
+import time
+from prometheus_client import CONTENT_TYPE_LATEST, Counter, Gauge, Histogram, generate_latest
+from pymongo import monitoring
+from starlette.responses import Response
+from starlette.routing import Match
+
+HTTP_REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route template",
+    ["method", "route", "status"]
+)
+HTTP_REQUESTS_IN_PROGRESS = Gauge(
+    "http_requests_in_progress",
+    "HTTP requests currently being handled",
+    ["method", "route"]
+)
+
+MONGO_COMMAND_DURATION = Histogram(
+    "mongo_command_duration_seconds",
+    "MongoDB command latency as reported by the driver",
+    ["command"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+)
+MONGO_COMMAND_FAILURES = Counter(
+    "mongo_command_failures_total",
+    "MongoDB commands that returned an error",
+    ["command"]
+)
+
+SHEETS_API_CALLS = Counter(
+    "sheets_api_calls_total",
+    "Google Sheets API calls by method and HTTP status",
+    ["method", "status"]
+)
+SHEETS_API_DURATION = Histogram(
+    "sheets_api_call_duration_seconds",
+    "Google Sheets API call latency",
+    ["method"],
+    buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+)
+SHEETS_API_RETRIES = Counter(
+    "sheets_api_retries_total",
+    "Google Sheets API calls retried after a throttling or server error",
+    ["method", "status"]
+)
+SHEETS_CONCURRENCY_LIMIT = Gauge(
+    "sheets_api_concurrency_limit",
+    "Current adaptive limit on concurrent Google Sheets API calls"
+)
+
+SYNC_ROWS = Counter(
+    "sync_rows_total",
+    "Rows moved by Google Sheets syncs",
+    ["direction", "mode"]
+)
+
+IGNORED_COMMANDS = {"hello", "isMaster", "ismaster", "ping", "endSessions"}
+
+
+class MongoCommandMetrics(monitoring.CommandListener):
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        if event.command_name not in IGNORED_COMMANDS:
+            MONGO_COMMAND_DURATION.labels(event.command_name).observe(event.duration_micros / 1e6)
+
+    def failed(self, event):
+        if event.command_name not in IGNORED_COMMANDS:
+            MONGO_COMMAND_DURATION.labels(event.command_name).observe(event.duration_micros / 1e6)
+            MONGO_COMMAND_FAILURES.labels(event.command_name).inc()
+
+
+def route_template(app, scope) -> str:
+    for route in app.router.routes:
+        match, _ = route.matches(scope)
+        if match == Match.FULL:
+            return route.path
+    return "unmatched"
+
+
+class PrometheusMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        route = route_template(scope["app"], scope)
+        status = "500"
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = str(message["status"])
+            await send(message)
+
+        in_progress = HTTP_REQUESTS_IN_PROGRESS.labels(method, route)
+        in_progress.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            HTTP_REQUEST_DURATION.labels(method, route, status).observe(time.perf_counter() - started)
+            in_progress.dec()
+
+
+def metrics_response() -> Response:
+    return Response(content=generate_latest(), media_type=CONTENT_TYPE_LATEST)
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field, EmailStr
-from typing import Optional
+from typing import Optional, Any
 from datetime import datetime
 from bson import ObjectId
 
@@ -36,6 +36,43 @@ class UserUpdate(BaseModel):
     role: Optional[str] = Field(None, min_length=1, max_length=50)
 
 
+class BulkUserUpdate(UserUpdate):
+    id: str
+
+
+class BulkUserDelete(BaseModel):
+    ids: list[str]
+
+
+class BulkItemResult(BaseModel):
+    index: int
+    id: Optional[str] = None
+    status: str
+    error: Optional[str] = None
+
+
+class BulkUsersResponse(BaseModel):
+    succeeded: int
+    failed: int
+    results: list[BulkItemResult]
+
+
+class ImportUsersResponse(BaseModel):
+    processed: int
+    inserted: int
+    updated: int
+    unchanged: int
+    failed: int
+    errors: list[dict[str, Any]]
+    errors_truncated: bool
+
+
+class RoleStatsResponse(BaseModel):
+    total: int
+    roles: dict[str, int]
+    reconciled_at: Optional[datetime] = None
+
+
 class UserInDB(UserBase):
     id: str = Field(alias="_id")
     created_at: datetime
@@ -73,6 +110,13 @@ class PaginatedUsers(BaseModel):
     total_pages: int
 
 
+class CursorPaginatedUsers(BaseModel):
+    users: list[UserResponse]
+    total: int
+    page_size: int
+    next_cursor: Optional[str] = None
+
+
 class CreateSheetRequest(BaseModel):
     sheet_name: str = Field(..., min_length=1, max_length=100)
 
@@ -82,3 +126,17 @@ class CreateSheetResponse(BaseModel):
     sheet_name: str
     sheet_url: str
     message: str
+
+
+class SyncJobResponse(BaseModel):
+    id: str
+    type: str
+    sheet_id: str
+    status: str
+    attempts: int
+    progress: dict[str, Any]
+    result: Optional[dict[str, Any]] = None
+    error: Optional[str] = None
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
@@ -0,0 +1,141 @@
+import asyncio
+import cProfile
+import io
+import marshal
+import pstats
+import random
+import time
+from datetime import datetime
+from typing import Optional
+from bson import Binary
+from pymongo.errors import CollectionInvalid
+from app.auth import is_admin_email
+from app.config import settings
+from app.database import get_database
+from app.sessions import decode_session_token, revocation_cache
+
+PROFILE_HEADER = b"x-profile"
+PROFILES_COLLECTION = "request_profiles"
+SUMMARY_LINES = 40
+
+
+def header_value(scope, name: bytes) -> Optional[str]:
+    for key, value in scope.get("headers", []):
+        if key == name:
+            return value.decode("latin-1")
+    return None
+
+
+async def requested_by_admin(scope) -> bool:
+    if header_value(scope, PROFILE_HEADER) not in ("1", "true"):
+        return False
+
+    authorization = header_value(scope, b"authorization") or ""
+    if not authorization.startswith("Bearer "):
+        return False
+
+    claims = decode_session_token(authorization[len("Bearer "):])
+    if not claims or not is_admin_email(claims["sub"]):
+        return False
+    return not (settings.session_revocation_enabled and await revocation_cache.is_revoked(claims["jti"]))
+
+
+def summarize_profile(profiler: cProfile.Profile) -> tuple:
+    output = io.StringIO()
+    stats = pstats.Stats(profiler, stream=output)
+    stats.sort_stats("cumulative").print_stats(SUMMARY_LINES)
+    return output.getvalue(), marshal.dumps(stats.stats)
+
+
+async def ensure_profiles_collection(db):
+    try:
+        await db.create_collection(PROFILES_COLLECTION, capped=True, size=settings.profiling_max_bytes)
+    except CollectionInvalid:
+        pass
+
+
+async def save_profile(scope, trigger: str, status: int, duration: float, profiler: cProfile.Profile,
+                       concurrent_requests: int):
+    summary, raw_stats = await asyncio.to_thread(summarize_profile, profiler)
+
+    db = get_database()
+    await db[PROFILES_COLLECTION].insert_one({
+        "method": scope["method"],
+        "path": scope["path"],
+        "query": scope.get("query_string", b"").decode("latin-1"),
+        "status": status,
+        "duration_ms": duration * 1000,
+        "trigger": trigger,
+        "concurrent_requests": concurrent_requests,
+        "summary": summary,
+        "pstats": Binary(raw_stats),
+        "created_at": datetime.utcnow()
+    })
+
+
+class ProfilingMiddleware:
+    def __init__(self, app, sample_rate: Optional[float] = None):
+        self.app = app
+        self.sample_rate = settings.profiling_sample_rate if sample_rate is None else sample_rate
+        self._active = False
+        self._in_flight = 0
+        self._overlapping = 0
+        self._collection_ready = False
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        self._in_flight += 1
+        if self._active:
+            self._overlapping += 1
+        try:
+            await self._handle(scope, receive, send)
+        finally:
+            self._in_flight -= 1
+
+    async def _handle(self, scope, receive, send):
+        if self._active:
+            trigger = None
+        elif await requested_by_admin(scope):
+            trigger = "header"
+        elif self.sample_rate and random.random() < self.sample_rate:
+            trigger = "sample"
+        else:
+            trigger = None
+
+        if trigger is None:
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        # cProfile follows the event loop thread, not the task, so any other
+        # request that runs while this one awaits is recorded in the same
+        # stats. Only one profiler runs at a time, and the profile records how
+        # many other requests overlapped with it.
+        self._active = True
+        self._overlapping = self._in_flight - 1
+        profiler = cProfile.Profile()
+        started = time.perf_counter()
+        profiler.enable()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            profiler.disable()
+            self._active = False
+
+        try:
+            if not self._collection_ready:
+                await ensure_profiles_collection(get_database())
+                self._collection_ready = True
+            await save_profile(scope, trigger, status, time.perf_counter() - started, profiler, self._overlapping)
+        except Exception as e:
+            print(f"Failed to store request profile: {e}")
@@ -0,0 +1,72 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from bson import ObjectId
+from app.auth import require_admin
+from app.database import ensure_indexes, get_database, index_report
+from app.profiling import PROFILES_COLLECTION
+
+router = APIRouter(prefix="/admin", tags=["Admin"])
+
+
+def to_profile_response(profile: dict) -> dict:
+    return {
+        "id": str(profile["_id"]),
+        **{key: value for key, value in profile.items() if key not in ("_id", "pstats")}
+    }
+
+
+async def find_profile(profile_id: str, projection: dict = None) -> dict:
+    if not ObjectId.is_valid(profile_id):
+        raise HTTPException(status_code=400, detail="Invalid profile ID format")
+
+    db = get_database()
+    profile = await db[PROFILES_COLLECTION].find_one({"_id": ObjectId(profile_id)}, projection)
+    if not profile:
+        raise HTTPException(status_code=404, detail="Profile not found")
+
+    return profile
+
+
+@router.get("/indexes")
+async def get_indexes(current_user: dict = Depends(require_admin)):
+    return await index_report()
+
+
+@router.post("/indexes/sync")
+async def sync_indexes(current_user: dict = Depends(require_admin)):
+    result = await ensure_indexes()
+
+    if result["failed"]:
+        message = "Some indexes could not be built"
+    elif result["created"]:
+        message = "Missing indexes created"
+    else:
+        message = "Indexes are up to date"
+
+    return {"message": message, **result}
+
+
+@router.get("/profiles")
+async def list_profiles(
+    limit: int = Query(20, ge=1, le=200),
+    current_user: dict = Depends(require_admin)
+):
+    db = get_database()
+    cursor = db[PROFILES_COLLECTION].find({}, {"pstats": 0, "summary": 0}).sort("_id", -1).limit(limit)
+
+    return {"profiles": [to_profile_response(profile) async for profile in cursor]}
+
+
+@router.get("/profiles/{profile_id}")
+async def get_profile(profile_id: str, current_user: dict = Depends(require_admin)):
+    return to_profile_response(await find_profile(profile_id, {"pstats": 0}))
+
+
+@router.get("/profiles/{profile_id}/pstats")
+async def download_profile_stats(profile_id: str, current_user: dict = Depends(require_admin)):
+    profile = await find_profile(profile_id, {"pstats": 1})
+
+    return Response(
+        content=bytes(profile["pstats"]),
+        media_type="application/octet-stream",
+        headers={"Content-Disposition": f'attachment; filename="profile-{profile_id}.pstats"'}
+    )
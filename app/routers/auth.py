@@ -1,6 +1,8 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Depends
 from fastapi.responses import JSONResponse
-from app.auth import create_flow, get_user_info, save_authenticated_user
+from app.auth import create_flow, get_user_info, save_authenticated_user, get_current_user
+from app.config import settings
+from app.sessions import create_session_token, revocation_cache
 
 router = APIRouter(prefix="/auth", tags=["Authentication"])
 
@@ -40,7 +42,8 @@ async def callback(code: str):
             name=user_info.get("name"),
             profile_pic=user_info.get("picture"),
             access_token=credentials.token,
-            refresh_token=credentials.refresh_token
+            refresh_token=credentials.refresh_token,
+            token_expiry=credentials.expiry
         )
 
         return JSONResponse({
@@ -50,12 +53,26 @@ async def callback(code: str):
                 "name": user_info.get("name"),
                 "profile_pic": user_info.get("picture")
             },
-            "access_token": user_info.get("email")
+            "access_token": create_session_token(user_info.get("email"), user_info.get("name")),
+            "token_type": "bearer",
+            "expires_in": settings.session_ttl_seconds
         })
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Failed to authenticate: {str(e)}")
 
 
+@router.post("/logout")
+async def logout(current_user: dict = Depends(get_current_user)):
+    session = current_user.get("session")
+
+    if not session:
+        raise HTTPException(status_code=400, detail="Only session tokens can be revoked")
+
+    await revocation_cache.revoke(session)
+
+    return {"message": "Logged out successfully"}
+
+
 @router.get("/me")
 async def get_current_user_info(email: str):
     from app.auth import get_authenticated_user
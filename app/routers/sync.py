@@ -1,10 +1,14 @@
-from fastapi import APIRouter, HTTPException, Depends
-from app.models import CreateSheetRequest, CreateSheetResponse
+from fastapi import APIRouter, HTTPException, Depends, Query
+from fastapi.responses import JSONResponse
+from app.models import CreateSheetRequest, CreateSheetResponse, SyncJobResponse
 from app.database import get_database
 from app.auth import get_current_user
+from app.config import settings
 from app.services.sheets_service import GoogleSheetsService
-from bson import ObjectId
-from datetime import datetime
+from app.services.sync_operations import sync_users_from_cloud, sync_users_to_cloud
+from app.services.sync_jobs import JOB_FROM_CLOUD, JOB_TO_CLOUD, enqueue_job, get_job
+from app.services.live_sync import register_sheet, unregister_sheet
+from typing import Literal
 
 router = APIRouter(prefix="/sync", tags=["Google Sheets Sync"])
 
@@ -33,30 +37,40 @@ async def create_google_sheet(
         raise HTTPException(status_code=500, detail=f"Failed to create sheet: {str(e)}")
 
 
+def job_accepted_response(job: dict) -> JSONResponse:
+    job_id = str(job["_id"])
+    return JSONResponse(
+        status_code=202,
+        content={
+            "message": "Sync job queued",
+            "job_id": job_id,
+            "status": job["status"],
+            "status_url": f"/sync/jobs/{job_id}"
+        }
+    )
+
+
 @router.post("/{sheet_id}/to-cloud")
 async def sync_to_cloud(
     sheet_id: str,
+    mode: Literal["full", "stream", "incremental"] = Query("full", description="Sync strategy"),
+    background: bool = Query(False, description="Queue the sync as a job and return 202"),
     current_user: dict = Depends(get_current_user)
 ):
     try:
-        db = get_database()
+        if background:
+            job = await enqueue_job(JOB_TO_CLOUD, current_user['email'], sheet_id, {"mode": mode})
+            return job_accepted_response(job)
 
-        users = await db.users.find({}).to_list(length=None)
-
-        if not users:
-            return {
-                "message": "No users found to sync",
-                "synced_count": 0
-            }
+        db = get_database()
 
-        result = await GoogleSheetsService.sync_to_cloud(
+        return await sync_users_to_cloud(
+            db,
             user_email=current_user['email'],
             sheet_id=sheet_id,
-            users_data=users
+            mode=mode
         )
 
-        return result
-
     except HTTPException as he:
         raise he
     except Exception as e:
@@ -66,65 +80,78 @@ async def sync_to_cloud(
 @router.post("/{sheet_id}/from-cloud")
 async def sync_from_cloud(
     sheet_id: str,
+    force: bool = Query(False, description="Reconcile every row, ignoring the stored row hashes"),
+    background: bool = Query(False, description="Queue the sync as a job and return 202"),
     current_user: dict = Depends(get_current_user)
 ):
     try:
+        if background:
+            job = await enqueue_job(JOB_FROM_CLOUD, current_user['email'], sheet_id, {"force": force})
+            return job_accepted_response(job)
+
         db = get_database()
 
-        sheet_users = await GoogleSheetsService.sync_from_cloud(
+        return await sync_users_from_cloud(
+            db,
             user_email=current_user['email'],
-            sheet_id=sheet_id
+            sheet_id=sheet_id,
+            force=force
         )
 
-        if not sheet_users:
-            return {
-                "message": "No users found in Google Sheet",
-                "inserted": 0,
-                "updated": 0
-            }
-
-        inserted_count = 0
-        updated_count = 0
-
-        for sheet_user in sheet_users:
-            if not sheet_user.get('email'):
-                continue
-
-            user_id = sheet_user.get('id')
-            existing_user = None
-
-            if user_id and ObjectId.is_valid(user_id):
-                existing_user = await db.users.find_one({"_id": ObjectId(user_id)})
-
-            if not existing_user:
-                existing_user = await db.users.find_one({"email": sheet_user['email']})
-
-            user_data = {
-                "name": sheet_user.get('name', ''),
-                "email": sheet_user['email'],
-                "role": sheet_user.get('role', ''),
-            }
-
-            if existing_user:
-                await db.users.update_one(
-                    {"_id": existing_user["_id"]},
-                    {"$set": user_data}
-                )
-                updated_count += 1
-            else:
-                user_data['created_at'] = datetime.utcnow()
-
-                await db.users.insert_one(user_data)
-                inserted_count += 1
-
-        return {
-            "message": f"Successfully synced from Google Sheets",
-            "inserted": inserted_count,
-            "updated": updated_count,
-            "total_processed": len(sheet_users)
-        }
-
     except HTTPException as he:
         raise he
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to sync from cloud: {str(e)}")
+
+
+@router.get("/jobs/{job_id}", response_model=SyncJobResponse)
+async def get_sync_job(
+    job_id: str,
+    current_user: dict = Depends(get_current_user)
+):
+    job = await get_job(job_id)
+
+    if not job or job["user_email"] != current_user['email']:
+        raise HTTPException(status_code=404, detail="Sync job not found")
+
+    return SyncJobResponse(
+        id=str(job["_id"]),
+        type=job["type"],
+        sheet_id=job["sheet_id"],
+        status=job["status"],
+        attempts=job["attempts"],
+        progress=job.get("progress") or {},
+        result=job.get("result"),
+        error=job.get("error"),
+        created_at=job["created_at"],
+        started_at=job.get("started_at"),
+        finished_at=job.get("finished_at")
+    )
+
+
+@router.post("/{sheet_id}/live")
+async def enable_live_sync(
+    sheet_id: str,
+    current_user: dict = Depends(get_current_user)
+):
+    if not await register_sheet(current_user['email'], sheet_id):
+        raise HTTPException(status_code=403, detail="Live sync for this sheet belongs to another user")
+
+    return {
+        "message": "Live sync enabled" if settings.live_sync_enabled else "Live sync registered, but LIVE_SYNC_ENABLED is off",
+        "sheet_id": sheet_id
+    }
+
+
+@router.delete("/{sheet_id}/live")
+async def disable_live_sync(
+    sheet_id: str,
+    current_user: dict = Depends(get_current_user)
+):
+    if not await unregister_sheet(current_user['email'], sheet_id):
+        raise HTTPException(status_code=404, detail="Live sync is not enabled for this sheet")
+
+    return {
+        "message": "Live sync disabled",
+        "sheet_id": sheet_id
+    }
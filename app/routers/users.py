@@ -1,70 +1,494 @@
-from fastapi import APIRouter, HTTPException, Depends, Query
-from app.models import UserCreate, UserUpdate, UserResponse, PaginatedUsers
-from app.database import get_database
+from fastapi import APIRouter, HTTPException, Depends, Query, Response, Body, File, Header, UploadFile
+from fastapi.responses import StreamingResponse
+from app.models import (
+    UserCreate, UserUpdate, UserResponse, PaginatedUsers, CursorPaginatedUsers,
+    BulkUserUpdate, BulkUserDelete, BulkItemResult, BulkUsersResponse, ImportUsersResponse, RoleStatsResponse
+)
+from app.config import settings
+from app.database import get_database, register_indexes
 from app.auth import get_current_user
+from app.services.sheets_service import SHEET_HEADERS, user_to_row
+from app.services.user_import import import_users as run_import, validation_message
+from app.services.user_stats import record_user_changes, get_role_stats, get_users_version, role_changes
+from app.services.user_tombstones import record_deleted_users
+from pydantic import ValidationError
+from pymongo import DeleteOne, IndexModel, InsertOne, ReturnDocument, UpdateOne
+from pymongo.errors import BulkWriteError, DuplicateKeyError
 from bson import ObjectId
+from bson.errors import InvalidId
 from datetime import datetime
+from typing import Any, Literal, Optional, Union
+import base64
+import csv
+import io
+import json
+import orjson
+import re
 
 router = APIRouter(prefix="/users", tags=["Users"])
 
+SEARCH_COLLATION = {"locale": "en", "strength": 2}
 
-@router.get("", response_model=PaginatedUsers)
+register_indexes(
+    "users",
+    IndexModel("email", unique=True),
+    IndexModel([("created_at", -1), ("_id", -1)]),
+    IndexModel([("role", 1), ("created_at", -1), ("_id", -1)]),
+    IndexModel("email", name="email_ci", collation=SEARCH_COLLATION),
+    IndexModel("name", name="name_ci", collation=SEARCH_COLLATION)
+)
+
+
+USERS_SORT = [("created_at", -1), ("_id", -1)]
+USER_PROJECTION = {"name": 1, "email": 1, "role": 1, "created_at": 1}
+
+
+def encode_cursor(user: dict) -> str:
+    payload = json.dumps({"c": user["created_at"].isoformat(), "i": str(user["_id"])}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).rstrip(b"=").decode("ascii")
+
+
+def decode_cursor(cursor: str) -> dict:
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        created_at = datetime.fromisoformat(payload["c"])
+        user_id = ObjectId(payload["i"])
+    except (ValueError, TypeError, KeyError, InvalidId):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+    return {
+        "$or": [
+            {"created_at": {"$lt": created_at}},
+            {"created_at": created_at, "_id": {"$lt": user_id}}
+        ]
+    }
+
+
+def build_users_filter(role: Optional[str], search: Optional[str],
+                       created_after: Optional[datetime], created_before: Optional[datetime]):
+    query = {}
+    collation = None
+
+    if role:
+        query["role"] = role
+
+    if search:
+        # Served by the email_ci / name_ci indexes, which need the query to
+        # use the same collation.
+        prefix_range = {"$gte": search, "$lt": search + "\uffff"}
+        query["$or"] = [{"email": prefix_range}, {"name": prefix_range}]
+        collation = SEARCH_COLLATION
+        if role:
+            # The collation applies to the whole query; $regex ignores it,
+            # so the role still has to match exactly.
+            query["role"] = {"$regex": f"^{re.escape(role)}$"}
+
+    if created_after or created_before:
+        query["created_at"] = {}
+        if created_after:
+            query["created_at"]["$gte"] = created_after
+        if created_before:
+            query["created_at"]["$lt"] = created_before
+
+    return query, collation
+
+
+def to_user_response(user: dict) -> UserResponse:
+    return UserResponse(
+        id=str(user["_id"]),
+        name=user["name"],
+        email=user["email"],
+        role=user["role"],
+        created_at=user["created_at"]
+    )
+
+
+def to_user_json(user: dict) -> dict:
+    return {
+        "id": str(user["_id"]),
+        "name": user["name"],
+        "email": user["email"],
+        "role": user["role"],
+        "created_at": user["created_at"]
+    }
+
+
+def json_response(content: dict, etag: Optional[str] = None) -> Response:
+    headers = {"ETag": etag} if etag else None
+    return Response(content=orjson.dumps(content), media_type="application/json", headers=headers)
+
+
+def user_etag(user: dict) -> str:
+    changed_at = user.get("updated_at") or user["created_at"]
+    return f'W/"{user["_id"]}-{int(changed_at.timestamp() * 1000)}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque_tag = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == opaque_tag for tag in if_none_match.split(","))
+
+
+def not_modified(etag: str) -> Response:
+    return Response(status_code=304, headers={"ETag": etag})
+
+
+async def iter_export_ndjson(cursor, batch_size: int):
+    lines = []
+    async for user in cursor:
+        lines.append(orjson.dumps(to_user_json(user)))
+        if len(lines) >= batch_size:
+            yield b"\n".join(lines) + b"\n"
+            lines = []
+
+    if lines:
+        yield b"\n".join(lines) + b"\n"
+
+
+async def iter_export_csv(cursor, batch_size: int):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(SHEET_HEADERS)
+    rows = 0
+
+    async for user in cursor:
+        writer.writerow(user_to_row(user))
+        rows += 1
+        if rows >= batch_size:
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate()
+            rows = 0
+
+    yield buffer.getvalue().encode("utf-8")
+
+
+def check_bulk_size(items: list):
+    if not items:
+        raise HTTPException(status_code=400, detail="No items to process")
+    if len(items) > settings.bulk_max_items:
+        raise HTTPException(status_code=400, detail=f"At most {settings.bulk_max_items} items per request")
+
+
+async def run_bulk_write(collection, operations: list, op_indexes: list, results: dict) -> set:
+    failed = set()
+    if not operations:
+        return failed
+
+    try:
+        await collection.bulk_write(operations, ordered=False)
+    except BulkWriteError as bwe:
+        for write_error in bwe.details.get("writeErrors", []):
+            index = op_indexes[write_error["index"]]
+            failed.add(index)
+            if write_error.get("code") == 11000:
+                message = "User with this email already exists"
+            else:
+                message = write_error.get("errmsg", "Write failed")
+            results[index] = BulkItemResult(index=index, id=results[index].id, status="error", error=message)
+
+    return failed
+
+
+def bulk_response(results: dict) -> BulkUsersResponse:
+    ordered = [results[index] for index in sorted(results)]
+    failed = sum(1 for item in ordered if item.status == "error")
+    return BulkUsersResponse(succeeded=len(ordered) - failed, failed=failed, results=ordered)
+
+
+@router.get("", response_model=Union[PaginatedUsers, CursorPaginatedUsers])
 async def get_users(
     page: int = Query(1, ge=1, description="Page number"),
     page_size: int = Query(10, ge=1, le=100, description="Items per page"),
+    paginate: Literal["page", "cursor"] = Query("page", description="Pagination mode"),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page (cursor mode)"),
+    role: Optional[str] = Query(None, description="Only users with this role"),
+    search: Optional[str] = Query(None, min_length=1, max_length=100, description="Case-insensitive email or name prefix"),
+    created_after: Optional[datetime] = Query(None, description="Only users created at or after this time"),
+    created_before: Optional[datetime] = Query(None, description="Only users created before this time"),
+    if_none_match: Optional[str] = Header(None),
     current_user: dict = Depends(get_current_user)
 ):
     db = get_database()
 
-    skip = (page - 1) * page_size
+    etag = f'W/"v{await get_users_version(db)}"'
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
 
-    total = await db.users.count_documents({})
+    query, collation = build_users_filter(role, search, created_after, created_before)
 
-    cursor = db.users.find({}).skip(skip).limit(page_size).sort("created_at", -1)
-    users = await cursor.to_list(length=page_size)
+    if query:
+        total = await db.users.count_documents(query, collation=collation)
+    else:
+        total = await db.users.estimated_document_count()
+
+    if paginate == "cursor" or cursor:
+        page_query = {"$and": [query, decode_cursor(cursor)]} if cursor else query
 
-    users_response = []
-    for user in users:
-        users_response.append(UserResponse(
-            id=str(user["_id"]),
-            name=user["name"],
-            email=user["email"],
-            role=user["role"],
-            created_at=user["created_at"]
-        ))
+        cursor = db.users.find(page_query, USER_PROJECTION, collation=collation).sort(USERS_SORT).limit(page_size + 1)
+        users = await cursor.to_list(length=page_size + 1)
+        has_more = len(users) > page_size
+        users = users[:page_size]
+
+        return json_response({
+            "users": [to_user_json(user) for user in users],
+            "total": total,
+            "page_size": page_size,
+            "next_cursor": encode_cursor(users[-1]) if has_more else None
+        }, etag)
+
+    skip = (page - 1) * page_size
+
+    cursor = db.users.find(query, USER_PROJECTION, collation=collation).skip(skip).limit(page_size).sort(USERS_SORT)
+    users = await cursor.to_list(length=page_size)
 
     total_pages = (total + page_size - 1) // page_size
 
-    return PaginatedUsers(
-        users=users_response,
-        total=total,
-        page=page,
-        page_size=page_size,
-        total_pages=total_pages
+    return json_response({
+        "users": [to_user_json(user) for user in users],
+        "total": total,
+        "page": page,
+        "page_size": page_size,
+        "total_pages": total_pages
+    }, etag)
+
+
+@router.get("/stats", response_model=RoleStatsResponse)
+async def get_user_stats(current_user: dict = Depends(get_current_user)):
+    db = get_database()
+    return RoleStatsResponse(**await get_role_stats(db))
+
+
+@router.get("/export")
+async def export_users(
+    format: Literal["ndjson", "csv"] = Query("ndjson", description="Export format"),
+    current_user: dict = Depends(get_current_user)
+):
+    db = get_database()
+    batch_size = settings.export_batch_size
+    cursor = db.users.find({}, USER_PROJECTION).sort("_id", 1).batch_size(batch_size)
+
+    if format == "csv":
+        body = iter_export_csv(cursor, batch_size)
+        media_type = "text/csv"
+    else:
+        body = iter_export_ndjson(cursor, batch_size)
+        media_type = "application/x-ndjson"
+
+    return StreamingResponse(
+        body,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="users.{format}"'}
     )
 
 
+@router.post("/import", response_model=ImportUsersResponse)
+async def import_users(
+    file: UploadFile = File(..., description="CSV or NDJSON file of users"),
+    format: Optional[Literal["ndjson", "csv"]] = Query(None, description="Defaults to the file extension"),
+    current_user: dict = Depends(get_current_user)
+):
+    if format is None:
+        filename = (file.filename or "").lower()
+        if filename.endswith(".csv"):
+            format = "csv"
+        elif filename.endswith((".ndjson", ".jsonl")):
+            format = "ndjson"
+        else:
+            raise HTTPException(status_code=400, detail="Could not detect file format, pass ?format=csv or ?format=ndjson")
+
+    db = get_database()
+    stream = io.TextIOWrapper(file.file, encoding="utf-8-sig", newline="")
+
+    try:
+        result = await run_import(
+            db,
+            stream,
+            format,
+            batch_size=settings.import_batch_size,
+            max_errors=settings.import_max_errors
+        )
+    except UnicodeDecodeError:
+        raise HTTPException(status_code=400, detail="File must be UTF-8 encoded")
+    except csv.Error as e:
+        raise HTTPException(status_code=400, detail=f"Invalid CSV: {str(e)}")
+    finally:
+        stream.detach()
+
+    return ImportUsersResponse(**result)
+
+
+@router.post("/bulk", response_model=BulkUsersResponse)
+async def create_users_bulk(
+    items: list[dict[str, Any]] = Body(...),
+    current_user: dict = Depends(get_current_user)
+):
+    check_bulk_size(items)
+    db = get_database()
+
+    now = datetime.utcnow()
+    results = {}
+    operations = []
+    op_indexes = []
+    created_roles = {}
+
+    for index, item in enumerate(items):
+        try:
+            user = UserCreate.model_validate(item)
+        except ValidationError as ve:
+            results[index] = BulkItemResult(index=index, status="error", error=validation_message(ve))
+            continue
+
+        user_id = ObjectId()
+        operations.append(InsertOne({
+            "_id": user_id,
+            "name": user.name,
+            "email": user.email,
+            "role": user.role,
+            "created_at": now,
+            "updated_at": now
+        }))
+        op_indexes.append(index)
+        created_roles[index] = user.role
+        results[index] = BulkItemResult(index=index, id=str(user_id), status="created")
+
+    failed = await run_bulk_write(db.users, operations, op_indexes, results)
+
+    await record_user_changes(db, role_changes(added=[
+        role for index, role in created_roles.items() if index not in failed
+    ]))
+
+    return bulk_response(results)
+
+
+@router.patch("/bulk", response_model=BulkUsersResponse)
+async def update_users_bulk(
+    items: list[dict[str, Any]] = Body(...),
+    current_user: dict = Depends(get_current_user)
+):
+    check_bulk_size(items)
+    db = get_database()
+
+    now = datetime.utcnow()
+    results = {}
+    updates = []
+
+    for index, item in enumerate(items):
+        try:
+            user_update = BulkUserUpdate.model_validate(item)
+        except ValidationError as ve:
+            item_id = str(item["id"]) if item.get("id") is not None else None
+            results[index] = BulkItemResult(index=index, id=item_id, status="error", error=validation_message(ve))
+            continue
+
+        if not ObjectId.is_valid(user_update.id):
+            results[index] = BulkItemResult(index=index, id=user_update.id, status="error", error="Invalid user ID format")
+            continue
+
+        update_data = {
+            k: v for k, v in user_update.model_dump(exclude_unset=True, exclude={"id"}).items() if v is not None
+        }
+        if not update_data:
+            results[index] = BulkItemResult(index=index, id=user_update.id, status="error", error="No fields to update")
+            continue
+
+        update_data["updated_at"] = now
+        updates.append((index, ObjectId(user_update.id), update_data))
+
+    ids = [user_id for _, user_id, _ in updates]
+    roles = {user["_id"]: user["role"] async for user in db.users.find({"_id": {"$in": ids}}, {"role": 1})}
+
+    operations = []
+    op_indexes = []
+    role_updates = {}
+    for index, user_id, update_data in updates:
+        if user_id not in roles:
+            results[index] = BulkItemResult(index=index, id=str(user_id), status="error", error="User not found")
+            continue
+        operations.append(UpdateOne({"_id": user_id}, {"$set": update_data}))
+        op_indexes.append(index)
+        results[index] = BulkItemResult(index=index, id=str(user_id), status="updated")
+        if "role" in update_data:
+            role_updates[index] = user_id, update_data["role"]
+
+    failed = await run_bulk_write(db.users, operations, op_indexes, results)
+
+    deltas = role_changes()
+    for index, (user_id, role) in role_updates.items():
+        if index not in failed and roles[user_id] != role:
+            deltas.update(role_changes(added=[role], removed=[roles[user_id]]))
+            roles[user_id] = role
+    await record_user_changes(db, deltas)
+
+    return bulk_response(results)
+
+
+@router.delete("/bulk", response_model=BulkUsersResponse)
+async def delete_users_bulk(
+    request: BulkUserDelete,
+    current_user: dict = Depends(get_current_user)
+):
+    check_bulk_size(request.ids)
+    db = get_database()
+
+    results = {}
+    valid = []
+    for index, user_id in enumerate(request.ids):
+        if ObjectId.is_valid(user_id):
+            valid.append((index, ObjectId(user_id)))
+        else:
+            results[index] = BulkItemResult(index=index, id=user_id, status="error", error="Invalid user ID format")
+
+    ids = [user_id for _, user_id in valid]
+    roles = {user["_id"]: user["role"] async for user in db.users.find({"_id": {"$in": ids}}, {"role": 1})}
+
+    operations = []
+    op_indexes = []
+    deleted_roles = {}
+    for index, user_id in valid:
+        role = roles.pop(user_id, None)
+        if role is None:
+            results[index] = BulkItemResult(index=index, id=str(user_id), status="error", error="User not found")
+            continue
+        operations.append(DeleteOne({"_id": user_id}))
+        op_indexes.append(index)
+        deleted_roles[index] = role
+        results[index] = BulkItemResult(index=index, id=str(user_id), status="deleted")
+
+    failed = await run_bulk_write(db.users, operations, op_indexes, results)
+
+    deleted_ids = [user_id for index, user_id in valid if index in deleted_roles and index not in failed]
+    await record_deleted_users(db, deleted_ids)
+    await record_user_changes(db, role_changes(removed=[
+        role for index, role in deleted_roles.items() if index not in failed
+    ]))
+
+    return bulk_response(results)
+
+
 @router.get("/{user_id}", response_model=UserResponse)
 async def get_user(
     user_id: str,
+    if_none_match: Optional[str] = Header(None),
     current_user: dict = Depends(get_current_user)
 ):
     if not ObjectId.is_valid(user_id):
         raise HTTPException(status_code=400, detail="Invalid user ID format")
 
     db = get_database()
-    user = await db.users.find_one({"_id": ObjectId(user_id)})
+    user = await db.users.find_one({"_id": ObjectId(user_id)}, {**USER_PROJECTION, "updated_at": 1})
 
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
 
-    return UserResponse(
-        id=str(user["_id"]),
-        name=user["name"],
-        email=user["email"],
-        role=user["role"],
-        created_at=user["created_at"]
-    )
+    etag = user_etag(user)
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+
+    return json_response(to_user_json(user), etag)
 
 
 @router.post("", response_model=UserResponse, status_code=201)
@@ -74,28 +498,25 @@ async def create_user(
 ):
     db = get_database()
 
-    existing_user = await db.users.find_one({"email": user.email})
-    if existing_user:
-        raise HTTPException(status_code=400, detail="User with this email already exists")
-
+    # BSON dates keep milliseconds; truncate so the response matches later reads.
+    now = datetime.utcnow()
+    now = now.replace(microsecond=now.microsecond // 1000 * 1000)
     user_data = {
         "name": user.name,
         "email": user.email,
         "role": user.role,
-        "created_at": datetime.utcnow()
+        "created_at": now,
+        "updated_at": now
     }
 
-    result = await db.users.insert_one(user_data)
+    try:
+        await db.users.insert_one(user_data)
+    except DuplicateKeyError:
+        raise HTTPException(status_code=400, detail="User with this email already exists")
 
-    created_user = await db.users.find_one({"_id": result.inserted_id})
+    await record_user_changes(db, role_changes(added=[user.role]))
 
-    return UserResponse(
-        id=str(created_user["_id"]),
-        name=created_user["name"],
-        email=created_user["email"],
-        role=created_user["role"],
-        created_at=created_user["created_at"]
-    )
+    return to_user_response(user_data)
 
 
 @router.put("/{user_id}", response_model=UserResponse)
@@ -109,37 +530,35 @@ async def update_user(
 
     db = get_database()
 
-    existing_user = await db.users.find_one({"_id": ObjectId(user_id)})
-    if not existing_user:
-        raise HTTPException(status_code=404, detail="User not found")
-
     update_data = {k: v for k, v in user_update.model_dump(exclude_unset=True).items() if v is not None}
 
     if not update_data:
+        if not await db.users.find_one({"_id": ObjectId(user_id)}, {"_id": 1}):
+            raise HTTPException(status_code=404, detail="User not found")
         raise HTTPException(status_code=400, detail="No fields to update")
 
-    if "email" in update_data:
-        email_exists = await db.users.find_one({
-            "email": update_data["email"],
-            "_id": {"$ne": ObjectId(user_id)}
-        })
-        if email_exists:
-            raise HTTPException(status_code=400, detail="Email already in use by another user")
-
-    await db.users.update_one(
-        {"_id": ObjectId(user_id)},
-        {"$set": update_data}
-    )
+    update_data["updated_at"] = datetime.utcnow()
 
-    updated_user = await db.users.find_one({"_id": ObjectId(user_id)})
+    try:
+        previous_user = await db.users.find_one_and_update(
+            {"_id": ObjectId(user_id)},
+            {"$set": update_data},
+            projection=USER_PROJECTION,
+            return_document=ReturnDocument.BEFORE
+        )
+    except DuplicateKeyError:
+        raise HTTPException(status_code=400, detail="Email already in use by another user")
 
-    return UserResponse(
-        id=str(updated_user["_id"]),
-        name=updated_user["name"],
-        email=updated_user["email"],
-        role=updated_user["role"],
-        created_at=updated_user["created_at"]
-    )
+    if not previous_user:
+        raise HTTPException(status_code=404, detail="User not found")
+
+    deltas = role_changes()
+    if previous_user["role"] != update_data.get("role", previous_user["role"]):
+        deltas = role_changes(added=[update_data["role"]], removed=[previous_user["role"]])
+    await record_user_changes(db, deltas)
+
+    updated_user = {**previous_user, **update_data}
+    return to_user_response(updated_user)
 
 
 @router.delete("/{user_id}", status_code=204)
@@ -152,10 +571,11 @@ async def delete_user(
 
     db = get_database()
 
-    user = await db.users.find_one({"_id": ObjectId(user_id)})
-    if not user:
+    deleted_user = await db.users.find_one_and_delete({"_id": ObjectId(user_id)}, projection={"role": 1})
+    if not deleted_user:
         raise HTTPException(status_code=404, detail="User not found")
 
-    await db.users.delete_one({"_id": ObjectId(user_id)})
+    await record_deleted_users(db, [deleted_user["_id"]])
+    await record_user_changes(db, role_changes(removed=[deleted_user["role"]]))
 
     return None
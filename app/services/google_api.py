@@ -0,0 +1,21 @@
+import json
+from functools import lru_cache
+from google.oauth2.credentials import Credentials
+from googleapiclient.discovery import build_from_document
+from googleapiclient.discovery_cache import get_static_doc
+
+
+@lru_cache(maxsize=None)
+def get_discovery_document(service_name: str, version: str) -> dict:
+    document = get_static_doc(service_name, version)
+    if document is None:
+        raise ValueError(f"No discovery document bundled for {service_name} {version}")
+    return json.loads(document)
+
+
+def build_service(service_name: str, version: str, credentials: Credentials, client_options: dict = None):
+    return build_from_document(
+        get_discovery_document(service_name, version),
+        credentials=credentials,
+        client_options=client_options
+    )
@@ -0,0 +1,205 @@
+import heapq
+from bson import ObjectId
+from datetime import datetime, timedelta
+from fastapi import HTTPException
+from pymongo import DeleteOne, IndexModel, InsertOne
+from app.config import settings
+from app.database import register_indexes
+from app.services.sheets_client import get_sheets_client
+from app.services.sheets_service import GoogleSheetsService, SHEET_HEADERS, USER_SHEET_PROJECTION, user_to_row
+from app.services.user_tombstones import find_deleted_user_ids
+
+FIRST_DATA_ROW = 2
+BLANK_ROW = [''] * len(SHEET_HEADERS)
+
+register_indexes("users", IndexModel("updated_at"))
+register_indexes("sheet_rows", IndexModel([("sheet_id", 1), ("user_id", 1)], unique=True))
+
+
+async def reset_sheet_state(db, sheet_id: str):
+    await db.sheet_sync_state.delete_one({'_id': sheet_id})
+    await db.sheet_rows.delete_many({'sheet_id': sheet_id})
+
+
+def coalesce_row_values(row_values: dict, max_rows: int) -> list:
+    ranges = []
+    for row in sorted(row_values):
+        current = ranges[-1] if ranges else None
+        if current and current['last_row'] == row - 1 and len(current['values']) < max_rows:
+            current['values'].append(row_values[row])
+            current['last_row'] = row
+        else:
+            ranges.append({'first_row': row, 'last_row': row, 'values': [row_values[row]]})
+
+    return [
+        {'range': f"Users!A{item['first_row']}:E{item['last_row']}", 'values': item['values']}
+        for item in ranges
+    ]
+
+
+async def write_row_values(client, sheet_id: str, row_values: dict, chunk_size: int):
+    batch = []
+    batch_rows = 0
+
+    for data in coalesce_row_values(row_values, chunk_size):
+        if batch and batch_rows + len(data['values']) > chunk_size:
+            await client.execute(client.values().batchUpdate(
+                spreadsheetId=sheet_id,
+                body={'valueInputOption': 'RAW', 'data': batch}
+            ))
+            batch = []
+            batch_rows = 0
+
+        batch.append(data)
+        batch_rows += len(data['values'])
+
+    if batch:
+        await client.execute(client.values().batchUpdate(
+            spreadsheetId=sheet_id,
+            body={'valueInputOption': 'RAW', 'data': batch}
+        ))
+
+
+async def load_row_map(db, sheet_id: str, user_ids: list, batch_size: int) -> dict:
+    row_map = {}
+    for start in range(0, len(user_ids), batch_size):
+        batch = user_ids[start:start + batch_size]
+        async for entry in db.sheet_rows.find({'sheet_id': sheet_id, 'user_id': {'$in': batch}}):
+            row_map[entry['user_id']] = entry['row']
+    return row_map
+
+
+async def apply_row_changes(db, client, sheet_id: str, state: dict, upserted_users: list,
+                            deleted_ids: list, chunk_size: int) -> dict:
+    user_ids = [user['_id'] for user in upserted_users] + list(deleted_ids)
+    row_map = await load_row_map(db, sheet_id, user_ids, chunk_size)
+
+    free_rows = list(state.get('free_rows', []))
+    heapq.heapify(free_rows)
+    next_row = state['next_row']
+
+    row_values = {}
+    row_operations = []
+    deleted_count = 0
+
+    for user_id in deleted_ids:
+        row = row_map.pop(user_id, None)
+        if row is None:
+            continue
+        row_values[row] = BLANK_ROW
+        heapq.heappush(free_rows, row)
+        row_operations.append(DeleteOne({'sheet_id': sheet_id, 'user_id': user_id}))
+        deleted_count += 1
+
+    inserted_count = 0
+    modified_count = 0
+
+    for user in upserted_users:
+        row = row_map.get(user['_id'])
+        if row is None:
+            if free_rows:
+                row = heapq.heappop(free_rows)
+            else:
+                row = next_row
+                next_row += 1
+            row_map[user['_id']] = row
+            row_operations.append(InsertOne({'sheet_id': sheet_id, 'user_id': user['_id'], 'row': row}))
+            inserted_count += 1
+        else:
+            modified_count += 1
+        row_values[row] = user_to_row(user)
+
+    if row_values:
+        await write_row_values(client, sheet_id, row_values, chunk_size)
+
+    if row_operations:
+        await db.sheet_rows.bulk_write(row_operations, ordered=True)
+
+    await db.sheet_sync_state.update_one(
+        {'_id': sheet_id},
+        {'$set': {'next_row': next_row, 'free_rows': sorted(free_rows)}}
+    )
+
+    return {
+        'inserted': inserted_count,
+        'modified': modified_count,
+        'deleted': deleted_count
+    }
+
+
+def next_watermark(started_at: datetime) -> datetime:
+    # Writes stamp updated_at before they commit, and instances' clocks
+    # drift, so step back far enough to catch late commits. Rows written
+    # twice are harmless.
+    return started_at - timedelta(seconds=settings.sync_watermark_margin_seconds)
+
+
+async def rebuild_sheet(db, user_email: str, sheet_id: str, chunk_size: int, started_at: datetime) -> dict:
+    await reset_sheet_state(db, sheet_id)
+
+    async def record_rows(first_row: int, chunk: list):
+        await db.sheet_rows.insert_many([
+            {'sheet_id': sheet_id, 'user_id': ObjectId(row[0]), 'row': first_row + offset}
+            for offset, row in enumerate(chunk)
+        ])
+
+    cursor = db.users.find({}, USER_SHEET_PROJECTION).batch_size(chunk_size)
+    result = await GoogleSheetsService.sync_to_cloud_stream(
+        user_email=user_email,
+        sheet_id=sheet_id,
+        cursor=cursor,
+        chunk_size=chunk_size,
+        on_chunk=record_rows
+    )
+
+    await db.sheet_sync_state.insert_one({
+        '_id': sheet_id,
+        'watermark': next_watermark(started_at),
+        'next_row': FIRST_DATA_ROW + result['synced_count'],
+        'free_rows': []
+    })
+
+    return {
+        **result,
+        'inserted': result['synced_count'],
+        'modified': 0,
+        'deleted': 0,
+        'rebuilt': True
+    }
+
+
+async def sync_to_cloud_incremental(db, user_email: str, sheet_id: str, chunk_size: int) -> dict:
+    started_at = datetime.utcnow()
+    state = await db.sheet_sync_state.find_one({'_id': sheet_id})
+
+    # Tombstones older than the TTL are gone, so a stale row map could miss deletions.
+    tombstone_cutoff = started_at - timedelta(seconds=settings.user_tombstone_ttl_seconds)
+    if state is None or state['watermark'] < tombstone_cutoff:
+        return await rebuild_sheet(db, user_email, sheet_id, chunk_size, started_at)
+
+    try:
+        client = await get_sheets_client(user_email)
+
+        watermark = state['watermark']
+        changed_users = await db.users.find(
+            {'$or': [{'updated_at': {'$gte': watermark}}, {'created_at': {'$gte': watermark}}]},
+            USER_SHEET_PROJECTION
+        ).sort('_id', 1).to_list(length=None)
+        deleted_ids = await find_deleted_user_ids(db, watermark)
+
+        result = await apply_row_changes(db, client, sheet_id, state, changed_users, deleted_ids, chunk_size)
+
+        await db.sheet_sync_state.update_one({'_id': sheet_id}, {'$set': {'watermark': next_watermark(started_at)}})
+
+        synced_count = result['inserted'] + result['modified']
+        return {
+            'message': f'Successfully synced {synced_count} changed users to Google Sheets',
+            'synced_count': synced_count,
+            **result,
+            'rebuilt': False
+        }
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to sync to Google Sheets: {str(e)}")
@@ -0,0 +1,198 @@
+import asyncio
+from datetime import datetime
+from typing import Optional
+from fastapi import HTTPException
+from pymongo.errors import DuplicateKeyError, OperationFailure, PyMongoError
+from app.config import settings
+from app.database import get_database
+from app.services.sheets_client import get_sheets_client
+from app.services.incremental_sync import apply_row_changes, reset_sheet_state, sync_to_cloud_incremental
+from app.services.sheet_locks import SheetLocked, SheetLockLost, sheet_lock
+
+CHANGE_STREAM_HISTORY_LOST = 286
+STATE_ID = 'users'
+LEADER_LOCK_ID = 'live-sync-leader'
+
+
+def coalesce_change(pending: dict, change: dict):
+    operation = change.get('operationType')
+    if operation not in ('insert', 'update', 'replace', 'delete'):
+        return
+
+    user_id = change['documentKey']['_id']
+    if operation == 'delete':
+        pending[user_id] = None
+    else:
+        pending[user_id] = change.get('fullDocument')
+
+
+async def register_sheet(user_email: str, sheet_id: str) -> bool:
+    db = get_database()
+    try:
+        await db.live_sync_sheets.update_one(
+            {'_id': sheet_id, 'user_email': user_email},
+            {'$set': {'updated_at': datetime.utcnow()}},
+            upsert=True
+        )
+    except DuplicateKeyError:
+        return False
+    return True
+
+
+async def unregister_sheet(user_email: str, sheet_id: str) -> bool:
+    db = get_database()
+    result = await db.live_sync_sheets.delete_one({'_id': sheet_id, 'user_email': user_email})
+    return result.deleted_count > 0
+
+
+class LiveSyncWorker:
+    def __init__(self, debounce_seconds: float, max_batch: int, chunk_size: int, lease_seconds: float):
+        self.debounce_seconds = debounce_seconds
+        self.max_batch = max_batch
+        self.chunk_size = chunk_size
+        self.lease_seconds = lease_seconds
+        self._task: Optional[asyncio.Task] = None
+        self._saved_token = None
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        # Only the instance holding the leader lock watches the change stream;
+        # the others wait to take over when its lease lapses.
+        while True:
+            try:
+                async with sheet_lock(get_database(), LEADER_LOCK_ID, self.lease_seconds):
+                    await self._follow_changes()
+            except asyncio.CancelledError:
+                raise
+            except SheetLocked:
+                await asyncio.sleep(self.lease_seconds / 3)
+            except SheetLockLost:
+                print("Live sync lost its leader lease, stopped watching")
+            except Exception as e:
+                print(f"Live sync worker error: {e}")
+                await asyncio.sleep(self.lease_seconds / 3)
+
+    async def _follow_changes(self):
+        while True:
+            try:
+                await self._watch()
+            except asyncio.CancelledError:
+                raise
+            except OperationFailure as e:
+                if e.code == CHANGE_STREAM_HISTORY_LOST:
+                    await self._reset_after_history_lost()
+                else:
+                    print(f"Live sync change stream failed: {e}")
+                    await asyncio.sleep(self.debounce_seconds)
+            except PyMongoError as e:
+                print(f"Live sync change stream failed: {e}")
+                await asyncio.sleep(self.debounce_seconds)
+
+    async def _watch(self):
+        db = get_database()
+        state = await db.live_sync_state.find_one({'_id': STATE_ID})
+
+        options = {
+            'full_document': 'updateLookup',
+            'max_await_time_ms': max(int(self.debounce_seconds * 1000), 1)
+        }
+        if state and state.get('resume_token'):
+            options['resume_after'] = state['resume_token']
+
+        loop = asyncio.get_running_loop()
+
+        async with db.users.watch(**options) as stream:
+            pending = {}
+            deadline = None
+
+            while stream.alive:
+                change = await stream.try_next()
+                if change is not None:
+                    coalesce_change(pending, change)
+                    if deadline is None:
+                        deadline = loop.time() + self.debounce_seconds
+
+                if pending and (loop.time() >= deadline or len(pending) >= self.max_batch):
+                    await self.flush(db, pending)
+                    await self._save_resume_token(db, stream.resume_token)
+                    pending = {}
+                    deadline = None
+                elif not pending and change is None:
+                    await self._save_resume_token(db, stream.resume_token)
+
+    async def _save_resume_token(self, db, resume_token):
+        if resume_token is None or resume_token == self._saved_token:
+            return
+        await db.live_sync_state.update_one(
+            {'_id': STATE_ID},
+            {'$set': {'resume_token': resume_token, 'updated_at': datetime.utcnow()}},
+            upsert=True
+        )
+        self._saved_token = resume_token
+
+    async def _reset_after_history_lost(self):
+        db = get_database()
+        print("Live sync resume token expired, rebuilding registered sheets on next change")
+        await db.live_sync_state.delete_one({'_id': STATE_ID})
+        self._saved_token = None
+        async for registration in db.live_sync_sheets.find({}, {'_id': 1}):
+            await reset_sheet_state(db, registration['_id'])
+
+    async def flush(self, db, pending: dict):
+        upserted_users = sorted(
+            (user for user in pending.values() if user is not None),
+            key=lambda user: user['_id']
+        )
+        deleted_ids = [user_id for user_id, user in pending.items() if user is None]
+
+        async for registration in db.live_sync_sheets.find({}):
+            sheet_id = registration['_id']
+            user_email = registration['user_email']
+
+            try:
+                async with sheet_lock(db, sheet_id):
+                    state = await db.sheet_sync_state.find_one({'_id': sheet_id})
+                    if state is None or registration.get('catch_up'):
+                        # Rows changed while another sync held the sheet; the
+                        # watermark-based incremental sync picks them up.
+                        await sync_to_cloud_incremental(db, user_email, sheet_id, self.chunk_size)
+                        await db.live_sync_sheets.update_one({'_id': sheet_id}, {'$unset': {'catch_up': ''}})
+                        continue
+
+                    client = await get_sheets_client(user_email)
+                    await apply_row_changes(db, client, sheet_id, state, upserted_users, deleted_ids, self.chunk_size)
+            except asyncio.CancelledError:
+                raise
+            except SheetLocked:
+                await db.live_sync_sheets.update_one({'_id': sheet_id}, {'$set': {'catch_up': True}})
+            except HTTPException as he:
+                # Sheets writes come before any row map changes, so the state
+                # is intact and the next flush can catch up incrementally.
+                print(f"Live sync to sheet {sheet_id} failed, it will catch up on the next flush: {he.detail}")
+                await db.live_sync_sheets.update_one({'_id': sheet_id}, {'$set': {'catch_up': True}})
+            except Exception as e:
+                print(f"Live sync to sheet {sheet_id} failed, it will be rebuilt: {e}")
+                try:
+                    await reset_sheet_state(db, sheet_id)
+                except Exception as reset_error:
+                    print(f"Failed to reset sync state of sheet {sheet_id}: {reset_error}")
+
+
+live_sync_worker = LiveSyncWorker(
+    debounce_seconds=settings.live_sync_debounce_seconds,
+    max_batch=settings.live_sync_max_batch,
+    chunk_size=settings.sync_chunk_size,
+    lease_seconds=settings.sync_job_lease_seconds
+)
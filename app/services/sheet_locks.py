@@ -0,0 +1,86 @@
+import asyncio
+import uuid
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta
+from fastapi import HTTPException
+from pymongo.errors import DuplicateKeyError, PyMongoError
+from app.config import settings
+
+
+class SheetLocked(HTTPException):
+    def __init__(self):
+        super().__init__(status_code=409, detail="Another sync is already running for this sheet")
+
+
+class SheetLockLost(HTTPException):
+    def __init__(self):
+        super().__init__(status_code=409, detail="Lost the lock on this sheet, the sync was aborted")
+
+
+async def acquire_sheet_lock(db, sheet_id: str, owner: str, lease_seconds: float) -> bool:
+    now = datetime.utcnow()
+    try:
+        await db.sync_locks.update_one(
+            {
+                '_id': sheet_id,
+                '$or': [{'expires_at': {'$lte': now}}, {'owner': owner}]
+            },
+            {'$set': {'owner': owner, 'expires_at': now + timedelta(seconds=lease_seconds)}},
+            upsert=True
+        )
+        return True
+    except DuplicateKeyError:
+        return False
+
+
+async def renew_sheet_lock(db, sheet_id: str, owner: str, lease_seconds: float) -> bool:
+    result = await db.sync_locks.update_one(
+        {'_id': sheet_id, 'owner': owner},
+        {'$set': {'expires_at': datetime.utcnow() + timedelta(seconds=lease_seconds)}}
+    )
+    return result.matched_count > 0
+
+
+async def release_sheet_lock(db, sheet_id: str, owner: str):
+    await db.sync_locks.delete_one({'_id': sheet_id, 'owner': owner})
+
+
+@asynccontextmanager
+async def sheet_lock(db, sheet_id: str, lease_seconds: float = None):
+    lease_seconds = lease_seconds or settings.sync_job_lease_seconds
+    owner = uuid.uuid4().hex
+    if not await acquire_sheet_lock(db, sheet_id, owner, lease_seconds):
+        raise SheetLocked()
+
+    loop = asyncio.get_running_loop()
+    task = asyncio.current_task()
+    lost = False
+
+    async def heartbeat():
+        nonlocal lost
+        renewed_at = loop.time()
+        while True:
+            await asyncio.sleep(lease_seconds / 3)
+            try:
+                if not await renew_sheet_lock(db, sheet_id, owner, lease_seconds):
+                    break
+                renewed_at = loop.time()
+            except PyMongoError as e:
+                print(f"Failed to renew lock on sheet {sheet_id}: {e}")
+                # Give up before the lease runs out rather than after.
+                if loop.time() - renewed_at >= lease_seconds * 2 / 3:
+                    break
+        lost = True
+        task.cancel()
+
+    heartbeat_task = asyncio.create_task(heartbeat())
+    try:
+        yield
+    except asyncio.CancelledError:
+        if not lost:
+            raise
+        task.uncancel()
+        raise SheetLockLost()
+    finally:
+        heartbeat_task.cancel()
+        await release_sheet_lock(db, sheet_id, owner)
@@ -0,0 +1,180 @@
+import asyncio
+import math
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import suppress
+from typing import Optional
+from fastapi import HTTPException
+from google.oauth2.credentials import Credentials
+from googleapiclient.errors import HttpError
+from app.auth import get_user_credentials
+from app.config import settings
+from app.metrics import SHEETS_API_CALLS, SHEETS_API_DURATION, SHEETS_API_RETRIES
+from app.services.google_api import build_service
+from app.services.sheets_throttle import (
+    backoff_delay, is_retryable, parse_retry_after, request_kind, sheets_throttle
+)
+
+_executor: Optional[ThreadPoolExecutor] = None
+
+
+def get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=settings.sheets_max_workers,
+            thread_name_prefix="sheets"
+        )
+    return _executor
+
+
+def shutdown_executor():
+    global _executor
+    if _executor:
+        _executor.shutdown(wait=False)
+        _executor = None
+
+
+def build_sheets_service(credentials: Credentials):
+    client_options = None
+    if settings.sheets_api_endpoint:
+        client_options = {"api_endpoint": settings.sheets_api_endpoint}
+
+    return build_service('sheets', 'v4', credentials, client_options=client_options)
+
+
+class SheetsClient:
+    def __init__(self, service, credentials: Credentials = None, user_email: str = None):
+        self.service = service
+        self.credentials = credentials
+        self.user_email = user_email
+        self.created_at = time.monotonic()
+        # httplib2 connections are not thread-safe, so a pooled client
+        # only runs one request at a time. Waiting happens on the event
+        # loop rather than in an executor thread.
+        self._lock = asyncio.Lock()
+
+    def spreadsheets(self):
+        return self.service.spreadsheets()
+
+    def values(self):
+        return self.service.spreadsheets().values()
+
+    def _execute(self, request):
+        method = getattr(request, "methodId", None) or "unknown"
+        status = "200"
+        started = time.perf_counter()
+        try:
+            return request.execute()
+        except HttpError as e:
+            status = str(e.resp.status)
+            raise
+        except Exception:
+            status = "error"
+            raise
+        finally:
+            SHEETS_API_CALLS.labels(method, status).inc()
+            SHEETS_API_DURATION.labels(method).observe(time.perf_counter() - started)
+
+    async def _run(self, loop, request):
+        future = loop.run_in_executor(get_executor(), self._execute, request)
+        try:
+            return await asyncio.shield(future)
+        except asyncio.CancelledError:
+            # The thread keeps using the connection until the call returns,
+            # so the lock is only released once it has.
+            with suppress(Exception):
+                await future
+            raise
+
+    async def execute(self, request):
+        loop = asyncio.get_running_loop()
+        kind = request_kind(request)
+        attempt = 0
+
+        while True:
+            # Take the client lock first so a request waiting for its turn
+            # does not hold one of the throttle's concurrency slots.
+            async with self._lock:
+                await sheets_throttle.acquire(self.user_email, kind)
+                status = None
+                try:
+                    return await self._run(loop, request)
+                except HttpError as e:
+                    status = e.resp.status
+                    if not is_retryable(request, status):
+                        raise
+                    error = e
+                finally:
+                    sheets_throttle.release(self.user_email, kind, status)
+
+            retry_after = parse_retry_after(error.resp.get('retry-after'))
+            if attempt >= settings.sheets_max_retries:
+                raise_exhausted(status, retry_after)
+
+            SHEETS_API_RETRIES.labels(getattr(request, "methodId", None) or "unknown", str(status)).inc()
+            await asyncio.sleep(backoff_delay(attempt, retry_after))
+            attempt += 1
+
+
+def raise_exhausted(status: int, retry_after: Optional[float]):
+    retry_seconds = retry_after if retry_after is not None else settings.sheets_backoff_max_seconds
+    headers = {"Retry-After": str(math.ceil(retry_seconds))}
+    if status == 429:
+        raise HTTPException(status_code=429, detail="Google Sheets API quota exceeded, retry later", headers=headers)
+    raise HTTPException(status_code=503, detail="Google Sheets API is unavailable, retry later", headers=headers)
+
+
+class SheetsClientPool:
+    def __init__(self, max_size: int, ttl_seconds: float):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._clients: OrderedDict = OrderedDict()
+
+    def get(self, user_email: str, credentials: Credentials) -> Optional[SheetsClient]:
+        client = self._clients.get(user_email)
+        if client is None:
+            return None
+
+        expired = time.monotonic() - client.created_at > self.ttl_seconds
+        if expired or client.credentials is not credentials:
+            del self._clients[user_email]
+            return None
+
+        self._clients.move_to_end(user_email)
+        return client
+
+    def put(self, user_email: str, client: SheetsClient):
+        self._clients[user_email] = client
+        self._clients.move_to_end(user_email)
+        while len(self._clients) > self.max_size:
+            self._clients.popitem(last=False)
+
+    def invalidate(self, user_email: str):
+        self._clients.pop(user_email, None)
+
+    def clear(self):
+        self._clients.clear()
+
+    def __len__(self):
+        return len(self._clients)
+
+
+client_pool = SheetsClientPool(
+    max_size=settings.sheets_client_pool_size,
+    ttl_seconds=settings.sheets_client_ttl_seconds
+)
+
+
+async def get_sheets_client(user_email: str) -> SheetsClient:
+    credentials = await get_user_credentials(user_email)
+
+    client = client_pool.get(user_email, credentials)
+    if client is None:
+        loop = asyncio.get_running_loop()
+        service = await loop.run_in_executor(get_executor(), build_sheets_service, credentials)
+        client = SheetsClient(service, credentials, user_email)
+        client_pool.put(user_email, client)
+
+    return client
@@ -1,16 +1,42 @@
-from googleapiclient.discovery import build
-from app.auth import get_user_credentials
+from app.services.sheets_client import get_sheets_client
 from fastapi import HTTPException
 from datetime import datetime
+import asyncio
+
+SHEET_HEADERS = ['ID', 'Name', 'Email', 'Role', 'Created At']
+SHEET_FIRST_DATA_ROW = 2
+
+USER_SHEET_PROJECTION = {'name': 1, 'email': 1, 'role': 1, 'created_at': 1}
+
+
+def user_to_row(user: dict) -> list:
+    created_at_str = user['created_at'].strftime('%Y-%m-%d %H:%M:%S') if isinstance(user['created_at'], datetime) else str(user['created_at'])
+    return [
+        str(user['_id']),
+        user['name'],
+        user['email'],
+        user['role'],
+        created_at_str
+    ]
+
+
+async def iter_row_chunks(cursor, chunk_size: int):
+    chunk = []
+    async for user in cursor:
+        chunk.append(user_to_row(user))
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+
+    if chunk:
+        yield chunk
 
 
 class GoogleSheetsService:
     @staticmethod
     async def create_sheet(user_email: str, sheet_name: str):
         try:
-            credentials = await get_user_credentials(user_email)
-
-            service = build('sheets', 'v4', credentials=credentials)
+            client = await get_sheets_client(user_email)
 
             spreadsheet = {
                 'properties': {
@@ -26,18 +52,18 @@ class GoogleSheetsService:
                 }]
             }
 
-            result = service.spreadsheets().create(body=spreadsheet).execute()
+            result = await client.execute(client.spreadsheets().create(body=spreadsheet))
 
             sheet_id = result['spreadsheetId']
             sheet_tab_id = result['sheets'][0]['properties']['sheetId']
 
-            headers = [['ID', 'Name', 'Email', 'Role', 'Created At']]
-            service.spreadsheets().values().update(
+            headers = [SHEET_HEADERS]
+            await client.execute(client.values().update(
                 spreadsheetId=sheet_id,
                 range='Users!A1:E1',
                 valueInputOption='RAW',
                 body={'values': headers}
-            ).execute()
+            ))
 
             formatting_request = {
                 'requests': [
@@ -70,10 +96,10 @@ class GoogleSheetsService:
                     }
                 ]
             }
-            service.spreadsheets().batchUpdate(
+            await client.execute(client.spreadsheets().batchUpdate(
                 spreadsheetId=sheet_id,
                 body=formatting_request
-            ).execute()
+            ))
 
             return {
                 'sheet_id': sheet_id,
@@ -81,75 +107,123 @@ class GoogleSheetsService:
                 'sheet_url': f'https://docs.google.com/spreadsheets/d/{sheet_id}'
             }
 
+        except HTTPException:
+            raise
         except Exception as e:
             raise HTTPException(status_code=500, detail=f"Failed to create Google Sheet: {str(e)}")
 
     @staticmethod
     async def sync_to_cloud(user_email: str, sheet_id: str, users_data: list):
         try:
-            credentials = await get_user_credentials(user_email)
-
-            service = build('sheets', 'v4', credentials=credentials)
+            client = await get_sheets_client(user_email)
 
-            values = [['ID', 'Name', 'Email', 'Role', 'Created At']]
+            values = [SHEET_HEADERS]
 
             for user in users_data:
-                created_at_str = user['created_at'].strftime('%Y-%m-%d %H:%M:%S') if isinstance(user['created_at'], datetime) else str(user['created_at'])
-                values.append([
-                    str(user['_id']),
-                    user['name'],
-                    user['email'],
-                    user['role'],
-                    created_at_str
-                ])
-
-            service.spreadsheets().values().clear(
+                values.append(user_to_row(user))
+
+            await client.execute(client.values().clear(
                 spreadsheetId=sheet_id,
                 range='Users!A2:E'
-            ).execute()
+            ))
 
             if len(values) > 1:
-                service.spreadsheets().values().update(
+                await client.execute(client.values().update(
                     spreadsheetId=sheet_id,
                     range='Users!A1',
                     valueInputOption='RAW',
                     body={'values': values}
-                ).execute()
+                ))
             else:
                 header_values = [values[0]]
-                service.spreadsheets().values().update(
+                await client.execute(client.values().update(
                     spreadsheetId=sheet_id,
                     range='Users!A1',
                     valueInputOption='RAW',
                     body={'values': header_values}
-                ).execute()
+                ))
 
             return {
                 'message': f'Successfully synced {len(values) - 1} users to Google Sheets',
                 'synced_count': len(values) - 1
             }
 
+        except HTTPException:
+            raise
         except Exception as e:
             raise HTTPException(status_code=500, detail=f"Failed to sync to Google Sheets: {str(e)}")
 
     @staticmethod
-    async def sync_from_cloud(user_email: str, sheet_id: str):
+    async def sync_to_cloud_stream(user_email: str, sheet_id: str, cursor, chunk_size: int, on_chunk=None):
+        pending = None
         try:
-            credentials = await get_user_credentials(user_email)
+            client = await get_sheets_client(user_email)
+
+            await client.execute(client.values().clear(
+                spreadsheetId=sheet_id,
+                range='Users!A2:E'
+            ))
+            await client.execute(client.values().update(
+                spreadsheetId=sheet_id,
+                range='Users!A1:E1',
+                valueInputOption='RAW',
+                body={'values': [SHEET_HEADERS]}
+            ))
 
-            service = build('sheets', 'v4', credentials=credentials)
+            synced_count = 0
+            next_row = 2
+
+            async for chunk in iter_row_chunks(cursor, chunk_size):
+                if pending:
+                    await pending
+
+                last_row = next_row + len(chunk) - 1
+                pending = asyncio.ensure_future(client.execute(client.values().update(
+                    spreadsheetId=sheet_id,
+                    range=f'Users!A{next_row}:E{last_row}',
+                    valueInputOption='RAW',
+                    body={'values': chunk}
+                )))
+
+                if on_chunk:
+                    await on_chunk(next_row, chunk)
+
+                next_row = last_row + 1
+                synced_count += len(chunk)
+
+            if pending:
+                await pending
+                pending = None
+
+            return {
+                'message': f'Successfully synced {synced_count} users to Google Sheets',
+                'synced_count': synced_count
+            }
+
+        except Exception as e:
+            if pending and not pending.done():
+                pending.cancel()
+            if isinstance(e, HTTPException):
+                raise
+            raise HTTPException(status_code=500, detail=f"Failed to sync to Google Sheets: {str(e)}")
+
+    @staticmethod
+    async def sync_from_cloud(user_email: str, sheet_id: str):
+        try:
+            client = await get_sheets_client(user_email)
 
-            result = service.spreadsheets().values().get(
+            result = await client.execute(client.values().get(
                 spreadsheetId=sheet_id,
                 range='Users!A2:E'
-            ).execute()
+            ))
 
             rows = result.get('values', [])
 
             users = []
-            for row in rows:
+            for row_number, row in enumerate(rows, start=SHEET_FIRST_DATA_ROW):
                 if len(row) >= 4:
                     user = {
+                        'row': row_number,
                         'id': row[0] if len(row) > 0 else None,
                         'name': row[1] if len(row) > 1 else '',
                         'email': row[2] if len(row) > 2 else '',
@@ -160,5 +234,7 @@ class GoogleSheetsService:
 
             return users
 
+        except HTTPException:
+            raise
         except Exception as e:
             raise HTTPException(status_code=500, detail=f"Failed to sync from Google Sheets: {str(e)}")
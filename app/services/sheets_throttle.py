@@ -0,0 +1,180 @@
+import asyncio
+import random
+import time
+from collections import OrderedDict, deque
+from email.utils import parsedate_to_datetime
+from typing import Optional
+from app.config import settings
+from app.metrics import SHEETS_CONCURRENCY_LIMIT
+
+READ = 'read'
+WRITE = 'write'
+READ_METHODS = {'get', 'batchGet', 'getByDataFilter', 'batchGetByDataFilter'}
+
+THROTTLE_STATUSES = {429, 503}
+SERVER_ERROR_STATUSES = {500, 502, 503, 504}
+# A 5xx may arrive after Sheets applied the request, so only calls that
+# are safe to repeat are retried on it. 429s are rejected before any work.
+IDEMPOTENT_VALUES_METHODS = {'get', 'batchGet', 'update', 'batchUpdate', 'clear', 'batchClear'}
+
+# Sheets enforces quotas per minute; allowing a 10 second burst keeps short
+# syncs fast without overshooting the window by much.
+BURST_SECONDS = 10
+
+
+def request_kind(request) -> str:
+    method = getattr(request, 'methodId', None) or ''
+    return READ if method.rsplit('.', 1)[-1] in READ_METHODS else WRITE
+
+
+def is_retryable(request, status: int) -> bool:
+    if status == 429:
+        return True
+    if status not in SERVER_ERROR_STATUSES:
+        return False
+    method = getattr(request, 'methodId', None) or ''
+    resource, _, action = method.rpartition('.')
+    return resource == 'sheets.spreadsheets.values' and action in IDEMPOTENT_VALUES_METHODS
+
+
+def parse_retry_after(value) -> Optional[float]:
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def backoff_delay(attempt: int, retry_after: Optional[float] = None) -> float:
+    ceiling = min(settings.sheets_backoff_max_seconds, settings.sheets_backoff_base_seconds * 2 ** attempt)
+    delay = random.uniform(0, ceiling)
+    if retry_after is not None:
+        delay = retry_after + random.uniform(0, settings.sheets_backoff_base_seconds)
+    return delay
+
+
+class TokenBucket:
+    def __init__(self, requests_per_minute: float):
+        self.rate = requests_per_minute / 60.0
+        self.capacity = max(1.0, self.rate * BURST_SECONDS)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def reserve(self) -> float:
+        # Tokens may go negative: each caller takes its place in line and
+        # sleeps until its token has been refilled.
+        self._refill()
+        self.tokens -= 1
+        return max(0.0, -self.tokens / self.rate)
+
+    def drain(self):
+        self._refill()
+        self.tokens = min(self.tokens, 0.0)
+
+
+class AdaptiveConcurrency:
+    def __init__(self, maximum: int, minimum: int = 1):
+        self.maximum = maximum
+        self.minimum = minimum
+        self.limit = float(maximum)
+        self.in_flight = 0
+        self._waiters = deque()
+        SHEETS_CONCURRENCY_LIMIT.set(self.limit)
+
+    async def acquire(self):
+        while self.in_flight >= int(self.limit):
+            waiter = asyncio.get_running_loop().create_future()
+            self._waiters.append(waiter)
+            try:
+                await waiter
+            except asyncio.CancelledError:
+                if waiter in self._waiters:
+                    self._waiters.remove(waiter)
+                self._wake()
+                raise
+        self.in_flight += 1
+
+    def release(self, throttled: bool = False):
+        self.in_flight -= 1
+        if throttled:
+            self.limit = max(float(self.minimum), self.limit / 2)
+        else:
+            self.limit = min(float(self.maximum), self.limit + 1 / self.limit)
+        SHEETS_CONCURRENCY_LIMIT.set(self.limit)
+        self._wake()
+
+    def _wake(self):
+        free = int(self.limit) - self.in_flight
+        while free > 0 and self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                free -= 1
+
+
+class SheetsThrottle:
+    def __init__(self, max_users: int):
+        self.max_users = max_users
+        self.reset()
+
+    def reset(self):
+        self._project_buckets = {}
+        self._user_buckets: OrderedDict = OrderedDict()
+        self.concurrency = AdaptiveConcurrency(maximum=settings.sheets_max_concurrency)
+
+    def _limits(self, kind: str):
+        # Quotas are shared by every instance using the same Cloud project,
+        # so each one only spends its share.
+        instances = max(1, settings.sheets_quota_instances)
+        if kind == READ:
+            limits = settings.sheets_user_read_requests_per_minute, settings.sheets_project_read_requests_per_minute
+        else:
+            limits = settings.sheets_user_write_requests_per_minute, settings.sheets_project_write_requests_per_minute
+        return tuple(limit / instances for limit in limits)
+
+    def _buckets(self, user_email: Optional[str], kind: str) -> list:
+        user_rate, project_rate = self._limits(kind)
+        buckets = []
+
+        if project_rate > 0:
+            if kind not in self._project_buckets:
+                self._project_buckets[kind] = TokenBucket(project_rate)
+            buckets.append(self._project_buckets[kind])
+
+        if user_rate > 0 and user_email:
+            key = (user_email, kind)
+            bucket = self._user_buckets.get(key)
+            if bucket is None:
+                bucket = self._user_buckets[key] = TokenBucket(user_rate)
+                while len(self._user_buckets) > self.max_users:
+                    self._user_buckets.popitem(last=False)
+            self._user_buckets.move_to_end(key)
+            buckets.append(bucket)
+
+        return buckets
+
+    async def acquire(self, user_email: Optional[str], kind: str):
+        wait = max([bucket.reserve() for bucket in self._buckets(user_email, kind)], default=0.0)
+        if wait:
+            await asyncio.sleep(wait)
+        await self.concurrency.acquire()
+
+    def release(self, user_email: Optional[str], kind: str, status: Optional[int] = None):
+        throttled = status in THROTTLE_STATUSES
+        if status == 429:
+            for bucket in self._buckets(user_email, kind):
+                bucket.drain()
+        self.concurrency.release(throttled=throttled)
+
+
+sheets_throttle = SheetsThrottle(max_users=settings.sheets_client_pool_size)
@@ -0,0 +1,246 @@
+import asyncio
+import socket
+import uuid
+from datetime import datetime, timedelta
+from typing import Optional
+from bson import ObjectId
+from fastapi import HTTPException
+from pymongo import IndexModel, ReturnDocument
+from pymongo.errors import PyMongoError
+from app.config import settings
+from app.database import get_database, register_indexes
+from app.services.sheet_locks import SheetLocked
+from app.services.sync_operations import sync_users_from_cloud, sync_users_to_cloud
+
+JOB_TO_CLOUD = 'to-cloud'
+JOB_FROM_CLOUD = 'from-cloud'
+
+STATUS_QUEUED = 'queued'
+STATUS_RUNNING = 'running'
+STATUS_SUCCEEDED = 'succeeded'
+STATUS_FAILED = 'failed'
+
+register_indexes("sync_jobs", IndexModel([("status", 1), ("created_at", 1)]))
+
+
+async def enqueue_job(job_type: str, user_email: str, sheet_id: str, params: dict) -> dict:
+    db = get_database()
+    now = datetime.utcnow()
+
+    job = {
+        'type': job_type,
+        'user_email': user_email,
+        'sheet_id': sheet_id,
+        'params': params,
+        'status': STATUS_QUEUED,
+        'attempts': 0,
+        'progress': {},
+        'result': None,
+        'error': None,
+        'lease_owner': None,
+        'lease_expires_at': None,
+        'created_at': now,
+        'updated_at': now,
+        'started_at': None,
+        'finished_at': None
+    }
+    result = await db.sync_jobs.insert_one(job)
+    job['_id'] = result.inserted_id
+
+    sync_job_worker.notify()
+    return job
+
+
+async def get_job(job_id: str) -> Optional[dict]:
+    if not ObjectId.is_valid(job_id):
+        return None
+    db = get_database()
+    return await db.sync_jobs.find_one({'_id': ObjectId(job_id)})
+
+
+async def run_job(db, job: dict, on_progress):
+    params = job.get('params') or {}
+
+    if job['type'] == JOB_TO_CLOUD:
+        return await sync_users_to_cloud(
+            db,
+            user_email=job['user_email'],
+            sheet_id=job['sheet_id'],
+            mode=params.get('mode', 'full'),
+            on_progress=on_progress
+        )
+
+    if job['type'] == JOB_FROM_CLOUD:
+        return await sync_users_from_cloud(
+            db,
+            user_email=job['user_email'],
+            sheet_id=job['sheet_id'],
+            force=params.get('force', False),
+            on_progress=on_progress
+        )
+
+    raise ValueError(f"Unknown sync job type: {job['type']}")
+
+
+class SyncJobWorker:
+    def __init__(self, concurrency: int, lease_seconds: int, poll_seconds: float, max_attempts: int):
+        self.concurrency = concurrency
+        self.lease_seconds = lease_seconds
+        self.poll_seconds = poll_seconds
+        self.max_attempts = max_attempts
+        self.worker_id = f"{socket.gethostname()}-{uuid.uuid4().hex[:8]}"
+        self._tasks: list = []
+        self._wakeup: Optional[asyncio.Event] = None
+
+    def start(self):
+        if self._tasks:
+            return
+        self._wakeup = asyncio.Event()
+        self._tasks = [asyncio.create_task(self._run()) for _ in range(self.concurrency)]
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        for task in self._tasks:
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        self._tasks = []
+        self._wakeup = None
+
+    def notify(self):
+        if self._wakeup:
+            self._wakeup.set()
+
+    async def _run(self):
+        while True:
+            try:
+                processed = await self.process_next()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Sync job worker error: {e}")
+                processed = False
+
+            if not processed:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_seconds)
+                except asyncio.TimeoutError:
+                    pass
+
+    async def claim_job(self, db) -> Optional[dict]:
+        now = datetime.utcnow()
+        locked_sheets = [lock['_id'] async for lock in db.sync_locks.find({'expires_at': {'$gt': now}}, {'_id': 1})]
+
+        return await db.sync_jobs.find_one_and_update(
+            {
+                '$or': [
+                    {'status': STATUS_QUEUED},
+                    {'status': STATUS_RUNNING, 'lease_expires_at': {'$lt': now}}
+                ],
+                'sheet_id': {'$nin': locked_sheets}
+            },
+            {
+                '$set': {
+                    'status': STATUS_RUNNING,
+                    'lease_owner': self.worker_id,
+                    'lease_expires_at': now + timedelta(seconds=self.lease_seconds),
+                    'started_at': now,
+                    'updated_at': now
+                },
+                '$inc': {'attempts': 1}
+            },
+            sort=[('created_at', 1)],
+            return_document=ReturnDocument.AFTER
+        )
+
+    async def renew_lease(self, db, job: dict) -> bool:
+        result = await db.sync_jobs.update_one(
+            {'_id': job['_id'], 'lease_owner': self.worker_id},
+            {'$set': {'lease_expires_at': datetime.utcnow() + timedelta(seconds=self.lease_seconds)}}
+        )
+        return result.matched_count > 0
+
+    async def finish_job(self, db, job: dict, status: str, result: dict = None, error: str = None):
+        now = datetime.utcnow()
+        await db.sync_jobs.update_one(
+            {'_id': job['_id'], 'lease_owner': self.worker_id},
+            {'$set': {
+                'status': status,
+                'result': result,
+                'error': error,
+                'lease_owner': None,
+                'lease_expires_at': None,
+                'finished_at': now,
+                'updated_at': now
+            }}
+        )
+
+    async def process_next(self) -> bool:
+        db = get_database()
+        job = await self.claim_job(db)
+        if job is None:
+            return False
+
+        if job['attempts'] > self.max_attempts:
+            await self.finish_job(db, job, STATUS_FAILED, error="Job lease expired too many times")
+            return True
+
+        async def on_progress(progress: dict):
+            await db.sync_jobs.update_one(
+                {'_id': job['_id'], 'lease_owner': self.worker_id},
+                {'$set': {'progress': progress, 'updated_at': datetime.utcnow()}}
+            )
+
+        job_task = asyncio.ensure_future(run_job(db, job, on_progress))
+        lease_lost = False
+
+        async def heartbeat():
+            nonlocal lease_lost
+            while True:
+                await asyncio.sleep(self.lease_seconds / 3)
+                try:
+                    renewed = await self.renew_lease(db, job)
+                except PyMongoError as e:
+                    print(f"Failed to renew lease on sync job {job['_id']}: {e}")
+                    continue
+                if not renewed:
+                    lease_lost = True
+                    job_task.cancel()
+                    return
+
+        heartbeat_task = asyncio.create_task(heartbeat())
+        try:
+            result = await job_task
+            await self.finish_job(db, job, STATUS_SUCCEEDED, result=result)
+        except asyncio.CancelledError:
+            if not lease_lost:
+                raise
+            print(f"Sync job {job['_id']} lost its lease and was aborted")
+        except SheetLocked:
+            await db.sync_jobs.update_one(
+                {'_id': job['_id'], 'lease_owner': self.worker_id},
+                {
+                    '$set': {'status': STATUS_QUEUED, 'lease_owner': None, 'lease_expires_at': None},
+                    '$inc': {'attempts': -1}
+                }
+            )
+            return False
+        except HTTPException as he:
+            await self.finish_job(db, job, STATUS_FAILED, error=str(he.detail))
+        except Exception as e:
+            await self.finish_job(db, job, STATUS_FAILED, error=str(e))
+        finally:
+            heartbeat_task.cancel()
+
+        return True
+
+
+sync_job_worker = SyncJobWorker(
+    concurrency=settings.sync_job_workers,
+    lease_seconds=settings.sync_job_lease_seconds,
+    poll_seconds=settings.sync_job_poll_seconds,
+    max_attempts=settings.sync_job_max_attempts
+)
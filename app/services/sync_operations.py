@@ -0,0 +1,94 @@
+from app.config import settings
+from app.metrics import SYNC_ROWS
+from app.services.sheets_service import GoogleSheetsService, SHEET_FIRST_DATA_ROW, USER_SHEET_PROJECTION
+from app.services.user_sync import reconcile_sheet_users
+from app.services.incremental_sync import reset_sheet_state, sync_to_cloud_incremental
+from app.services.sheet_locks import sheet_lock
+
+
+async def sync_users_to_cloud(db, user_email: str, sheet_id: str, mode: str = "full", on_progress=None):
+    async with sheet_lock(db, sheet_id):
+        result = await _sync_users_to_cloud(db, user_email, sheet_id, mode, on_progress)
+    SYNC_ROWS.labels("to_cloud", mode).inc(result.get("synced_count", 0))
+    return result
+
+
+async def _sync_users_to_cloud(db, user_email: str, sheet_id: str, mode: str, on_progress):
+    if mode == "incremental":
+        return await sync_to_cloud_incremental(
+            db,
+            user_email=user_email,
+            sheet_id=sheet_id,
+            chunk_size=settings.sync_chunk_size
+        )
+
+    await reset_sheet_state(db, sheet_id)
+
+    if mode == "stream":
+        cursor = db.users.find({}, USER_SHEET_PROJECTION).batch_size(settings.sync_chunk_size)
+
+        async def report_progress(first_row: int, chunk: list):
+            await on_progress({"rows_written": first_row + len(chunk) - SHEET_FIRST_DATA_ROW})
+
+        return await GoogleSheetsService.sync_to_cloud_stream(
+            user_email=user_email,
+            sheet_id=sheet_id,
+            cursor=cursor,
+            chunk_size=settings.sync_chunk_size,
+            on_chunk=report_progress if on_progress else None
+        )
+
+    users = await db.users.find({}).to_list(length=None)
+
+    if not users:
+        return {
+            "message": "No users found to sync",
+            "synced_count": 0
+        }
+
+    return await GoogleSheetsService.sync_to_cloud(
+        user_email=user_email,
+        sheet_id=sheet_id,
+        users_data=users
+    )
+
+
+async def sync_users_from_cloud(db, user_email: str, sheet_id: str, force: bool = False, on_progress=None):
+    async with sheet_lock(db, sheet_id):
+        return await _sync_users_from_cloud(db, user_email, sheet_id, force, on_progress)
+
+
+async def _sync_users_from_cloud(db, user_email: str, sheet_id: str, force: bool, on_progress):
+    sheet_users = await GoogleSheetsService.sync_from_cloud(
+        user_email=user_email,
+        sheet_id=sheet_id
+    )
+
+    if not sheet_users:
+        return {
+            "message": "No users found in Google Sheet",
+            "inserted": 0,
+            "updated": 0
+        }
+
+    if on_progress:
+        await on_progress({"rows_read": len(sheet_users)})
+
+    result = await reconcile_sheet_users(
+        db,
+        sheet_users,
+        settings.sync_batch_size,
+        sheet_id=sheet_id,
+        force=force
+    )
+    SYNC_ROWS.labels("from_cloud", "force" if force else "changed").inc(len(sheet_users))
+
+    return {
+        "message": f"Successfully synced from Google Sheets, {result['changed']} rows changed",
+        "inserted": result["inserted"],
+        "updated": result["updated"],
+        "changed": result["changed"],
+        "unchanged": result["unchanged"],
+        "total_processed": len(sheet_users),
+        "errors": result["errors"]
+    }
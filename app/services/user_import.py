@@ -0,0 +1,169 @@
+import csv
+import json
+from datetime import datetime
+from itertools import islice
+from pydantic import ValidationError
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+from starlette.concurrency import run_in_threadpool
+from app.models import UserCreate
+from app.services.user_stats import record_user_changes, role_changes
+
+
+def validation_message(error: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(part) for part in item['loc'])}: {item['msg']}" if item["loc"] else item["msg"]
+        for item in error.errors()
+    )
+
+
+def normalize_record(record: dict) -> dict:
+    return {
+        str(key).strip().lower().replace(' ', '_'): value.strip() if isinstance(value, str) else value
+        for key, value in record.items()
+        if key is not None
+    }
+
+
+def iter_csv_records(stream):
+    reader = csv.DictReader(stream)
+    for record in reader:
+        yield reader.line_num, normalize_record(record), None
+
+
+def iter_ndjson_records(stream):
+    for line_number, line in enumerate(stream, start=1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as e:
+            yield line_number, None, f"Invalid JSON: {e}"
+            continue
+        if not isinstance(record, dict):
+            yield line_number, None, "Expected a JSON object"
+            continue
+        yield line_number, normalize_record(record), None
+
+
+def iter_records(stream, format: str):
+    if format == 'csv':
+        return iter_csv_records(stream)
+    return iter_ndjson_records(stream)
+
+
+class ImportSummary:
+    def __init__(self, max_errors: int):
+        self.max_errors = max_errors
+        self.processed = 0
+        self.inserted = 0
+        self.updated = 0
+        self.unchanged = 0
+        self.failed = 0
+        self.errors = []
+
+    def add_error(self, row: int, email, error: str):
+        self.failed += 1
+        if len(self.errors) < self.max_errors:
+            self.errors.append({'row': row, 'email': email, 'error': error})
+
+    def to_dict(self) -> dict:
+        return {
+            'processed': self.processed,
+            'inserted': self.inserted,
+            'updated': self.updated,
+            'unchanged': self.unchanged,
+            'failed': self.failed,
+            'errors': self.errors,
+            'errors_truncated': self.failed > len(self.errors)
+        }
+
+
+def validate_batch(batch: list, summary: ImportSummary) -> dict:
+    users = {}
+    for row, record, error in batch:
+        summary.processed += 1
+        if error:
+            summary.add_error(row, None, error)
+            continue
+
+        try:
+            user = UserCreate.model_validate(record)
+        except ValidationError as ve:
+            summary.add_error(row, record.get('email'), validation_message(ve))
+            continue
+
+        if user.email in users:
+            summary.add_error(row, user.email, "Duplicate email in import batch")
+            continue
+
+        users[user.email] = (row, user)
+
+    return users
+
+
+async def upsert_batch(db, users: dict, summary: ImportSummary):
+    existing = {
+        user['email']: user
+        async for user in db.users.find({'email': {'$in': list(users)}}, {'email': 1, 'name': 1, 'role': 1})
+    }
+
+    now = datetime.utcnow()
+    operations = []
+    rows = []
+
+    for email, (row, user) in users.items():
+        current = existing.get(email)
+        if current and current.get('name') == user.name and current.get('role') == user.role:
+            summary.unchanged += 1
+            continue
+
+        operations.append(UpdateOne(
+            {'email': email},
+            {
+                '$set': {'name': user.name, 'role': user.role, 'updated_at': now},
+                '$setOnInsert': {'created_at': now}
+            },
+            upsert=True
+        ))
+        rows.append((row, email, current, user.role))
+
+    if not operations:
+        return
+
+    failed = {}
+    try:
+        await db.users.bulk_write(operations, ordered=False)
+    except BulkWriteError as bwe:
+        for write_error in bwe.details.get('writeErrors', []):
+            failed[write_error['index']] = write_error.get('errmsg', 'Write failed')
+
+    deltas = role_changes()
+    for index, (row, email, current, role) in enumerate(rows):
+        if index in failed:
+            summary.add_error(row, email, failed[index])
+        elif current is None:
+            summary.inserted += 1
+            deltas[role] += 1
+        else:
+            summary.updated += 1
+            if current.get('role') != role:
+                deltas.update(role_changes(added=[role], removed=[current.get('role')]))
+
+    await record_user_changes(db, deltas)
+
+
+async def import_users(db, stream, format: str, batch_size: int, max_errors: int) -> dict:
+    records = iter_records(stream, format)
+    summary = ImportSummary(max_errors)
+
+    while True:
+        batch = await run_in_threadpool(lambda: list(islice(records, batch_size)))
+        if not batch:
+            break
+
+        users = validate_batch(batch, summary)
+        if users:
+            await upsert_batch(db, users, summary)
+
+    return summary.to_dict()
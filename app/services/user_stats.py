@@ -0,0 +1,115 @@
+import asyncio
+from collections import Counter
+from datetime import datetime
+from typing import Optional
+from pymongo import DeleteMany, ReplaceOne, UpdateOne
+from app.config import settings
+from app.database import get_database
+
+TOTAL_ID = 'total'
+VERSION_ID = 'version'
+ROLE_PREFIX = 'role:'
+
+
+def role_changes(added: list = (), removed: list = ()) -> Counter:
+    deltas = Counter()
+    for role in added:
+        deltas[role] += 1
+    for role in removed:
+        deltas[role] -= 1
+    return deltas
+
+
+async def record_user_changes(db, deltas: Counter):
+    operations = [
+        UpdateOne({'_id': f'{ROLE_PREFIX}{role}'}, {'$inc': {'count': delta}}, upsert=True)
+        for role, delta in deltas.items()
+        if delta
+    ]
+    total_delta = sum(deltas.values())
+    if total_delta:
+        operations.append(UpdateOne({'_id': TOTAL_ID}, {'$inc': {'count': total_delta}}, upsert=True))
+    operations.append(UpdateOne({'_id': VERSION_ID}, {'$inc': {'count': 1}}, upsert=True))
+
+    await db.user_counters.bulk_write(operations, ordered=False)
+
+
+async def get_users_version(db) -> int:
+    counter = await db.user_counters.find_one({'_id': VERSION_ID})
+    return counter['count'] if counter else 0
+
+
+async def recount_roles(db) -> dict:
+    counts = {
+        entry['_id']: entry['count']
+        async for entry in db.users.aggregate([{'$group': {'_id': '$role', 'count': {'$sum': 1}}}])
+    }
+    now = datetime.utcnow()
+
+    operations = [
+        ReplaceOne({'_id': f'{ROLE_PREFIX}{role}'}, {'count': count, 'reconciled_at': now}, upsert=True)
+        for role, count in counts.items()
+    ]
+    operations.append(ReplaceOne(
+        {'_id': TOTAL_ID},
+        {'count': sum(counts.values()), 'reconciled_at': now},
+        upsert=True
+    ))
+    operations.append(UpdateOne({'_id': VERSION_ID}, {'$inc': {'count': 1}}, upsert=True))
+    operations.append(DeleteMany({
+        '_id': {'$regex': f'^{ROLE_PREFIX}', '$nin': [f'{ROLE_PREFIX}{role}' for role in counts]}
+    }))
+
+    await db.user_counters.bulk_write(operations, ordered=True)
+    return counts
+
+
+async def get_role_stats(db) -> dict:
+    roles = {}
+    total = 0
+    reconciled_at = None
+
+    async for counter in db.user_counters.find({}):
+        if counter['_id'] == TOTAL_ID:
+            total = counter['count']
+            reconciled_at = counter.get('reconciled_at')
+        elif counter['_id'].startswith(ROLE_PREFIX) and counter['count'] > 0:
+            roles[counter['_id'][len(ROLE_PREFIX):]] = counter['count']
+
+    return {
+        'total': total,
+        'roles': dict(sorted(roles.items())),
+        'reconciled_at': reconciled_at
+    }
+
+
+class RoleStatsReconciler:
+    def __init__(self, interval_seconds: float):
+        self.interval_seconds = interval_seconds
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        while True:
+            try:
+                await recount_roles(get_database())
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Role stats reconcile failed: {e}")
+            await asyncio.sleep(self.interval_seconds)
+
+
+role_stats_reconciler = RoleStatsReconciler(interval_seconds=settings.role_stats_reconcile_seconds)
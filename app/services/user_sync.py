@@ -0,0 +1,192 @@
+from pymongo import IndexModel, InsertOne, UpdateOne
+from pymongo.errors import BulkWriteError
+from bson import ObjectId
+from datetime import datetime
+import hashlib
+from app.database import register_indexes
+from app.services.user_stats import record_user_changes, role_changes
+
+register_indexes("sheet_row_snapshots", IndexModel([("sheet_id", 1), ("key", 1)], unique=True))
+
+
+def _batches(items: list, batch_size: int):
+    for start in range(0, len(items), batch_size):
+        yield items[start:start + batch_size]
+
+
+def row_key(sheet_user: dict) -> str:
+    return sheet_user.get('id') or sheet_user['email']
+
+
+def row_hash(sheet_user: dict) -> str:
+    content = '\x1f'.join([
+        sheet_user.get('id') or '',
+        sheet_user.get('name') or '',
+        sheet_user['email'],
+        sheet_user.get('role') or '',
+    ])
+    return hashlib.sha1(content.encode('utf-8')).hexdigest()
+
+
+async def load_row_hashes(db, sheet_id: str, keys: list, batch_size: int) -> dict:
+    hashes = {}
+    for batch in _batches(keys, batch_size):
+        cursor = db.sheet_row_snapshots.find({'sheet_id': sheet_id, 'key': {'$in': batch}}, {'key': 1, 'hash': 1})
+        async for snapshot in cursor:
+            hashes[snapshot['key']] = snapshot['hash']
+    return hashes
+
+
+async def save_row_hashes(db, sheet_id: str, row_hashes: dict, batch_size: int):
+    operations = [
+        UpdateOne({'sheet_id': sheet_id, 'key': key}, {'$set': {'hash': value}}, upsert=True)
+        for key, value in row_hashes.items()
+    ]
+    for batch in _batches(operations, batch_size):
+        await db.sheet_row_snapshots.bulk_write(batch, ordered=False)
+
+
+async def prefetch_existing_users(db, sheet_users: list, batch_size: int):
+    ids = {ObjectId(user['id']) for user in sheet_users if user.get('id') and ObjectId.is_valid(user['id'])}
+    emails = {user['email'] for user in sheet_users}
+
+    by_id = {}
+    by_email = {}
+    roles = {}
+    projection = {'_id': 1, 'email': 1, 'role': 1}
+
+    for batch in _batches(list(ids), batch_size):
+        async for user in db.users.find({'_id': {'$in': batch}}, projection):
+            by_id[user['_id']] = user
+            roles[user['_id']] = user.get('role')
+
+    for batch in _batches(list(emails), batch_size):
+        async for user in db.users.find({'email': {'$in': batch}}, projection):
+            by_email[user['email']] = user['_id']
+            roles[user['_id']] = user.get('role')
+
+    for user in by_id.values():
+        by_email.setdefault(user['email'], user['_id'])
+
+    return by_id, by_email, roles
+
+
+def plan_operations(rows: list, by_id: dict, by_email: dict, roles: dict):
+    now = datetime.utcnow()
+    operations = []
+    role_moves = []
+    emails_by_id = {user_id: user['email'] for user_id, user in by_id.items()}
+
+    for _, sheet_user in rows:
+        user_id = sheet_user.get('id')
+        target_id = None
+
+        if user_id and ObjectId.is_valid(user_id) and ObjectId(user_id) in by_id:
+            target_id = ObjectId(user_id)
+
+        if target_id is None:
+            target_id = by_email.get(sheet_user['email'])
+
+        user_data = {
+            'name': sheet_user.get('name', ''),
+            'email': sheet_user['email'],
+            'role': sheet_user.get('role', ''),
+            'updated_at': now,
+        }
+
+        if target_id is not None:
+            operations.append(UpdateOne({'_id': target_id}, {'$set': user_data}))
+            role_moves.append((roles.get(target_id), user_data['role']))
+            previous_email = emails_by_id.get(target_id)
+            if previous_email and previous_email != user_data['email'] and by_email.get(previous_email) == target_id:
+                del by_email[previous_email]
+        else:
+            target_id = ObjectId()
+            user_data['created_at'] = now
+            operations.append(InsertOne({'_id': target_id, **user_data}))
+            role_moves.append((None, user_data['role']))
+            by_id[target_id] = {'_id': target_id, 'email': user_data['email']}
+
+        by_email[user_data['email']] = target_id
+        emails_by_id[target_id] = user_data['email']
+        roles[target_id] = user_data['role']
+
+    return operations, role_moves
+
+
+async def flush_operations(db, operations: list, role_moves: list, rows: list, batch_size: int):
+    inserted_count = 0
+    updated_count = 0
+    errors = []
+
+    for start in range(0, len(operations), batch_size):
+        batch = operations[start:start + batch_size]
+        failed = {}
+
+        try:
+            await db.users.bulk_write(batch, ordered=False)
+        except BulkWriteError as bwe:
+            for write_error in bwe.details.get('writeErrors', []):
+                failed[write_error['index']] = write_error.get('errmsg', 'Write failed')
+
+        deltas = role_changes()
+        for offset, operation in enumerate(batch):
+            row_number, sheet_user = rows[start + offset]
+            if offset in failed:
+                errors.append({
+                    'row': row_number,
+                    'email': sheet_user['email'],
+                    'error': failed[offset]
+                })
+                continue
+
+            previous_role, role = role_moves[start + offset]
+            if isinstance(operation, InsertOne):
+                inserted_count += 1
+                deltas[role] += 1
+            else:
+                updated_count += 1
+                if previous_role != role:
+                    deltas.update(role_changes(added=[role], removed=[previous_role]))
+
+        await record_user_changes(db, deltas)
+
+    return inserted_count, updated_count, errors
+
+
+async def reconcile_sheet_users(db, sheet_users: list, batch_size: int, sheet_id: str = None,
+                                force: bool = False) -> dict:
+    rows = [(sheet_user['row'], sheet_user) for sheet_user in sheet_users if sheet_user.get('email')]
+    changed_rows = rows
+    current_hashes = {}
+
+    if sheet_id:
+        current_hashes = {row_key(sheet_user): row_hash(sheet_user) for _, sheet_user in rows}
+        if not force:
+            previous_hashes = await load_row_hashes(db, sheet_id, list(current_hashes), batch_size)
+            changed_rows = [
+                (row_number, sheet_user) for row_number, sheet_user in rows
+                if previous_hashes.get(row_key(sheet_user)) != current_hashes[row_key(sheet_user)]
+            ]
+
+    by_id, by_email, roles = await prefetch_existing_users(
+        db, [sheet_user for _, sheet_user in changed_rows], batch_size
+    )
+    operations, role_moves = plan_operations(changed_rows, by_id, by_email, roles)
+    inserted_count, updated_count, errors = await flush_operations(db, operations, role_moves, changed_rows, batch_size)
+
+    if sheet_id:
+        failed_rows = {error['row'] for error in errors}
+        await save_row_hashes(db, sheet_id, {
+            row_key(sheet_user): current_hashes[row_key(sheet_user)]
+            for row_number, sheet_user in changed_rows
+            if row_number not in failed_rows
+        }, batch_size)
+
+    return {
+        'inserted': inserted_count,
+        'updated': updated_count,
+        'changed': len(changed_rows),
+        'unchanged': len(rows) - len(changed_rows),
+        'errors': errors
+    }
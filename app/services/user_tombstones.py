@@ -0,0 +1,26 @@
+from datetime import datetime
+from pymongo import IndexModel
+from app.config import settings
+from app.database import register_indexes
+
+register_indexes(
+    "user_tombstones",
+    IndexModel("deleted_at", expireAfterSeconds=settings.user_tombstone_ttl_seconds)
+)
+
+
+async def record_deleted_users(db, user_ids: list):
+    if not user_ids:
+        return
+    now = datetime.utcnow()
+    await db.user_tombstones.insert_many(
+        [{'user_id': user_id, 'deleted_at': now} for user_id in user_ids],
+        ordered=False
+    )
+
+
+async def find_deleted_user_ids(db, since: datetime) -> list:
+    return [
+        tombstone['user_id']
+        async for tombstone in db.user_tombstones.find({'deleted_at': {'$gte': since}}, {'user_id': 1})
+    ]
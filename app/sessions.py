@@ -0,0 +1,94 @@
+import base64
+import hashlib
+import hmac
+import json
+import time
+import uuid
+from datetime import datetime
+from typing import Optional
+from app.config import settings
+from app.database import get_database, register_indexes
+from pymongo import IndexModel
+
+register_indexes("revoked_sessions", IndexModel("expires_at", expireAfterSeconds=0))
+
+
+def _b64encode(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode("ascii")
+
+
+def _b64decode(data: str) -> bytes:
+    return base64.urlsafe_b64decode(data + "=" * (-len(data) % 4))
+
+
+def _sign(body: str) -> str:
+    digest = hmac.new(settings.secret_key.encode("utf-8"), body.encode("ascii"), hashlib.sha256).digest()
+    return _b64encode(digest)
+
+
+def create_session_token(email: str, name: Optional[str] = None, ttl_seconds: Optional[int] = None) -> str:
+    issued_at = int(time.time())
+    payload = {
+        "sub": email,
+        "name": name,
+        "iat": issued_at,
+        "exp": issued_at + (ttl_seconds or settings.session_ttl_seconds),
+        "jti": uuid.uuid4().hex
+    }
+    body = _b64encode(json.dumps(payload, separators=(",", ":")).encode("utf-8"))
+    return f"{body}.{_sign(body)}"
+
+
+def decode_session_token(token: str) -> Optional[dict]:
+    if not token.isascii():
+        return None
+
+    body, _, signature = token.partition(".")
+    if not body or not signature:
+        return None
+
+    if not hmac.compare_digest(signature, _sign(body)):
+        return None
+
+    try:
+        claims = json.loads(_b64decode(body))
+    except ValueError:
+        return None
+
+    if not isinstance(claims, dict) or claims.get("exp", 0) <= time.time():
+        return None
+
+    return claims
+
+
+class RevocationCache:
+    def __init__(self, refresh_seconds: float):
+        self.refresh_seconds = refresh_seconds
+        self._revoked: set = set()
+        self._loaded_at: Optional[float] = None
+
+    async def is_revoked(self, session_id: str) -> bool:
+        if self._loaded_at is None or time.monotonic() - self._loaded_at > self.refresh_seconds:
+            await self.refresh()
+        return session_id in self._revoked
+
+    async def refresh(self):
+        db = get_database()
+        self._revoked = {entry["_id"] async for entry in db.revoked_sessions.find({}, {"_id": 1})}
+        self._loaded_at = time.monotonic()
+
+    async def revoke(self, claims: dict):
+        db = get_database()
+        await db.revoked_sessions.update_one(
+            {"_id": claims["jti"]},
+            {"$set": {"email": claims["sub"], "expires_at": datetime.utcfromtimestamp(claims["exp"])}},
+            upsert=True
+        )
+        self._revoked.add(claims["jti"])
+
+    def clear(self):
+        self._revoked = set()
+        self._loaded_at = None
+
+
+revocation_cache = RevocationCache(refresh_seconds=settings.session_revocation_refresh_seconds)
@@ -0,0 +1,210 @@
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+from datetime import datetime
+from bson import ObjectId
+from benchmarks.common import git_commit, seed_users, setup_env, summarize
+
+setup_env()
+
+import httpx
+from motor.motor_asyncio import AsyncIOMotorClient
+from app.routers.users import USERS_SORT, encode_cursor
+from app.sessions import create_session_token
+
+SAMPLE_IDS = 1000
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def sample_ids(db, size: int) -> list:
+    pipeline = [{"$sample": {"size": min(SAMPLE_IDS, size)}}, {"$project": {"_id": 1}}]
+    return [str(user["_id"]) async for user in db.users.aggregate(pipeline)]
+
+
+async def deep_cursor(db, size: int) -> str:
+    user = await db.users.find({}, {"created_at": 1}).sort(USERS_SORT).skip(int(size * 0.9)).limit(1).to_list(length=1)
+    return encode_cursor(user[0])
+
+
+async def drive(client: httpx.AsyncClient, requests, concurrency: int, duration: float) -> dict:
+    latencies = []
+    errors = 0
+    deadline = time.perf_counter() + duration
+
+    async def worker():
+        nonlocal errors
+        while time.perf_counter() < deadline:
+            method, url, body = next(requests)
+            started = time.perf_counter()
+            response = await client.request(method, url, json=body)
+            latencies.append(time.perf_counter() - started)
+            if response.status_code >= 400:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    return {
+        **summarize(latencies),
+        "rps": len(latencies) / elapsed if elapsed else 0.0,
+        "errors": errors
+    }
+
+
+def scenarios(size: int, page_size: int, ids: list, cursor: str, created_ids: list):
+    run_id = ObjectId()
+    deep_page = max(1, int(size * 0.9) // page_size)
+    counter = itertools.count()
+
+    def repeat(method, url, body=None):
+        return itertools.repeat((method, url, body))
+
+    def random_get():
+        while True:
+            yield "GET", f"/users/{random.choice(ids)}", None
+
+    def creates():
+        for i in counter:
+            yield "POST", "/users", {"name": f"Bench {i}", "email": f"bench-{run_id}-{i}@example.com", "role": "User"}
+
+    def updates():
+        for i in counter:
+            yield "PUT", f"/users/{random.choice(ids)}", {"name": f"Updated {i}"}
+
+    def deletes():
+        while created_ids:
+            yield "DELETE", f"/users/{created_ids.pop()}", None
+        while True:
+            yield "DELETE", f"/users/{ObjectId()}", None
+
+    return {
+        "list_shallow": lambda: repeat("GET", f"/users?page=1&page_size={page_size}"),
+        "list_deep": lambda: repeat("GET", f"/users?page={deep_page}&page_size={page_size}"),
+        "list_cursor_deep": lambda: repeat("GET", f"/users?page_size={page_size}&cursor={cursor}"),
+        "get_by_id": random_get,
+        "create": creates,
+        "update": updates,
+        "delete": deletes
+    }
+
+
+async def collect_created_ids(db) -> list:
+    return [str(user["_id"]) async for user in db.users.find({"email": {"$regex": "^bench-"}}, {"_id": 1})]
+
+
+def start_server(mongodb_uri: str):
+    port = free_port()
+    env = {
+        **os.environ,
+        "MONGODB_URI": mongodb_uri,
+        "LIVE_SYNC_ENABLED": "false",
+        "SYNC_JOBS_ENABLED": "false",
+        "ROLE_STATS_RECONCILE_SECONDS": "0"
+    }
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"],
+        env=env
+    )
+    return process, f"http://127.0.0.1:{port}"
+
+
+async def wait_for_server(base_url: str, timeout: float = 30.0):
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient(base_url=base_url) as client:
+        while time.monotonic() < deadline:
+            try:
+                if (await client.get("/health")).status_code == 200:
+                    return
+            except httpx.TransportError:
+                pass
+            await asyncio.sleep(0.2)
+    raise RuntimeError(f"Server at {base_url} did not become healthy")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="HTTP load benchmark for the user API")
+    parser.add_argument("--sizes", default="1000,100000,1000000", help="Comma-separated users collection sizes")
+    parser.add_argument("--scenarios", default=None, help="Comma-separated subset of scenarios to run")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds per scenario")
+    parser.add_argument("--page-size", type=int, default=50)
+    parser.add_argument("--base-url", default=None, help="Benchmark a running server instead of starting one")
+    parser.add_argument("--mongodb-uri", default=os.environ["MONGODB_URI"])
+    parser.add_argument("--output", default="bench_output.json")
+    args = parser.parse_args()
+
+    random.seed(1234)
+    mongo = AsyncIOMotorClient(args.mongodb_uri)
+    db = mongo.get_default_database()
+
+    process = None
+    base_url = args.base_url
+    if base_url is None:
+        process, base_url = start_server(args.mongodb_uri)
+
+    token = create_session_token("bench@example.com", "Benchmark")
+    report = {
+        "commit": git_commit(),
+        "started_at": datetime.utcnow().isoformat(),
+        "concurrency": args.concurrency,
+        "duration_seconds": args.duration,
+        "page_size": args.page_size,
+        "results": {}
+    }
+
+    try:
+        await wait_for_server(base_url)
+        limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+        async with httpx.AsyncClient(
+            base_url=base_url,
+            headers={"Authorization": f"Bearer {token}"},
+            limits=limits,
+            timeout=60.0
+        ) as client:
+            for size in [int(value) for value in args.sizes.split(",")]:
+                await seed_users(db, size)
+                ids = await sample_ids(db, size)
+                cursor = await deep_cursor(db, size)
+                created_ids = []
+                results = report["results"][str(size)] = {}
+
+                for name, build in scenarios(size, args.page_size, ids, cursor, created_ids).items():
+                    if args.scenarios and name not in args.scenarios.split(","):
+                        continue
+                    if name == "delete":
+                        created_ids.extend(await collect_created_ids(db))
+
+                    results[name] = await drive(client, build(), args.concurrency, args.duration)
+                    stats = results[name]
+                    print(
+                        f"{size:>8} {name:<17} {stats['rps']:9.1f} rps  p50 {stats['p50_ms']:8.2f} ms  "
+                        f"p95 {stats['p95_ms']:8.2f} ms  p99 {stats['p99_ms']:8.2f} ms  errors {stats['errors']}"
+                    )
+
+                await db.users.delete_many({"email": {"$regex": "^bench-"}})
+    finally:
+        if process:
+            process.terminate()
+            process.wait()
+        mongo.close()
+
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"wrote {args.output}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
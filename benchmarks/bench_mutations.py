@@ -0,0 +1,151 @@
+import argparse
+import asyncio
+import time
+from datetime import datetime
+from bson import ObjectId
+from pymongo import monitoring
+from benchmarks.common import setup_env, summarize
+
+setup_env()
+
+from app.database import close_mongo_connection, connect_to_mongo, get_database, wait_for_indexes
+from app.models import UserCreate, UserUpdate
+from app.routers.users import create_user, delete_user, update_user
+from app.services.user_stats import record_user_changes, role_changes
+from app.services.user_tombstones import record_deleted_users
+
+
+class CommandCounter(monitoring.CommandListener):
+    def __init__(self):
+        self.count = 0
+
+    def started(self, event):
+        if event.command_name not in ("endSessions", "hello", "isMaster", "ping"):
+            self.count += 1
+
+    def succeeded(self, event):
+        pass
+
+    def failed(self, event):
+        pass
+
+
+async def legacy_create(db, user: UserCreate):
+    if await db.users.find_one({"email": user.email}):
+        raise ValueError("duplicate")
+    now = datetime.utcnow()
+    result = await db.users.insert_one({
+        "name": user.name, "email": user.email, "role": user.role, "created_at": now, "updated_at": now
+    })
+    await record_user_changes(db, role_changes(added=[user.role]))
+    return await db.users.find_one({"_id": result.inserted_id})
+
+
+async def legacy_update(db, user_id: str, user_update: UserUpdate):
+    existing = await db.users.find_one({"_id": ObjectId(user_id)})
+    if not existing:
+        raise ValueError("missing")
+    update_data = {k: v for k, v in user_update.model_dump(exclude_unset=True).items() if v is not None}
+    update_data["updated_at"] = datetime.utcnow()
+    if "email" in update_data:
+        if await db.users.find_one({"email": update_data["email"], "_id": {"$ne": ObjectId(user_id)}}):
+            raise ValueError("duplicate")
+    await db.users.update_one({"_id": ObjectId(user_id)}, {"$set": update_data})
+    deltas = role_changes()
+    if existing["role"] != update_data.get("role", existing["role"]):
+        deltas = role_changes(added=[update_data["role"]], removed=[existing["role"]])
+    await record_user_changes(db, deltas)
+    return await db.users.find_one({"_id": ObjectId(user_id)})
+
+
+async def legacy_delete(db, user_id: str):
+    existing = await db.users.find_one({"_id": ObjectId(user_id)})
+    if not existing:
+        raise ValueError("missing")
+    await db.users.delete_one({"_id": ObjectId(user_id)})
+    await record_deleted_users(db, [existing["_id"]])
+    await record_user_changes(db, role_changes(removed=[existing["role"]]))
+
+
+async def current_create(db, user: UserCreate):
+    return await create_user(user, current_user={})
+
+
+async def current_update(db, user_id: str, user_update: UserUpdate):
+    return await update_user(user_id, user_update, current_user={})
+
+
+async def current_delete(db, user_id: str):
+    return await delete_user(user_id, current_user={})
+
+
+PATHS = {
+    "legacy": (legacy_create, legacy_update, legacy_delete),
+    "current": (current_create, current_update, current_delete)
+}
+
+
+async def timed(samples: list, coro):
+    started = time.perf_counter()
+    result = await coro
+    samples.append(time.perf_counter() - started)
+    return result
+
+
+async def run_path(db, counter: CommandCounter, name: str, iterations: int) -> dict:
+    create, update, delete = PATHS[name]
+    timings = {"create": [], "update": [], "delete": []}
+    commands = {"create": 0, "update": 0, "delete": 0}
+
+    for i in range(iterations):
+        user = UserCreate(name=f"Bench {i}", email=f"bench-{name}-{i}@example.com", role="User")
+
+        before = counter.count
+        created = await timed(timings["create"], create(db, user))
+        commands["create"] += counter.count - before
+        user_id = str(created["_id"] if isinstance(created, dict) else created.id)
+
+        before = counter.count
+        await timed(timings["update"], update(db, user_id, UserUpdate(
+            role="Admin", email=f"bench-{name}-{i}-renamed@example.com"
+        )))
+        commands["update"] += counter.count - before
+
+        before = counter.count
+        await timed(timings["delete"], delete(db, user_id))
+        commands["delete"] += counter.count - before
+
+    return {
+        op: {**summarize(samples), "commands_per_op": commands[op] / iterations}
+        for op, samples in timings.items()
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Latency of user mutations, legacy multi-query vs current paths")
+    parser.add_argument("--iterations", type=int, default=500)
+    args = parser.parse_args()
+
+    counter = CommandCounter()
+    monitoring.register(counter)
+
+    await connect_to_mongo()
+    await wait_for_indexes()
+    db = get_database()
+
+    try:
+        for name in PATHS:
+            report = await run_path(db, counter, name, args.iterations)
+            for op, stats in report.items():
+                print(
+                    f"{name:>9} {op:<6} mean {stats['mean_ms']:7.3f} ms  p50 {stats['p50_ms']:7.3f} ms  "
+                    f"p95 {stats['p95_ms']:7.3f} ms  p99 {stats['p99_ms']:7.3f} ms  "
+                    f"{stats['commands_per_op']:.1f} commands/op"
+                )
+    finally:
+        await db.users.delete_many({"email": {"$regex": "^bench-"}})
+        await close_mongo_connection()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,68 @@
+import argparse
+import timeit
+from datetime import datetime, timedelta
+from bson import ObjectId
+from benchmarks.common import setup_env
+
+setup_env()
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from app.models import PaginatedUsers
+from app.routers.users import json_response, to_user_json, to_user_response
+
+
+def make_users(count: int) -> list:
+    start = datetime(2024, 1, 1)
+    return [
+        {
+            "_id": ObjectId(),
+            "name": f"User {i}",
+            "email": f"user{i}@example.com",
+            "role": "Developer" if i % 2 else "Manager",
+            "created_at": start + timedelta(seconds=i, milliseconds=i % 1000)
+        }
+        for i in range(count)
+    ]
+
+
+def model_path(users: list) -> bytes:
+    page = PaginatedUsers(
+        users=[to_user_response(user) for user in users],
+        total=len(users),
+        page=1,
+        page_size=len(users),
+        total_pages=1
+    )
+    validated = PaginatedUsers.model_validate(page.model_dump())
+    return JSONResponse(content=jsonable_encoder(validated)).body
+
+
+def fast_path(users: list) -> bytes:
+    return json_response({
+        "users": [to_user_json(user) for user in users],
+        "total": len(users),
+        "page": 1,
+        "page_size": len(users),
+        "total_pages": 1
+    }).body
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-row serialization cost of GET /users pages")
+    parser.add_argument("--page-size", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--number", type=int, default=200)
+    args = parser.parse_args()
+
+    users = make_users(args.page_size)
+    assert model_path(users) == fast_path(users)
+
+    for label, func in [("model", model_path), ("orjson", fast_path)]:
+        best = min(timeit.repeat(lambda: func(users), repeat=args.repeat, number=args.number))
+        per_page = best / args.number
+        print(f"{label:>7}: {per_page * 1e6:9.1f} us/page  {per_page / args.page_size * 1e6:7.2f} us/row")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,199 @@
+import argparse
+import asyncio
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+from collections import Counter
+from datetime import datetime
+from pymongo import monitoring
+from benchmarks.common import git_commit, seed_users, setup_env
+
+setup_env()
+
+from motor.motor_asyncio import AsyncIOMotorClient
+from tests.sheets_emulator import SheetsEmulator
+
+BENCH_EMAIL = "bench-sync@example.com"
+DIRECTIONS = ["full", "stream", "incremental", "from-cloud"]
+INCREMENTAL_CHANGE_RATIO = 0.01
+IGNORED_COMMANDS = {"endSessions", "hello", "isMaster", "ping", "buildInfo"}
+
+
+class CommandCounter(monitoring.CommandListener):
+    def __init__(self):
+        self.commands = Counter()
+
+    def started(self, event):
+        if event.command_name not in IGNORED_COMMANDS:
+            self.commands[event.command_name] += 1
+
+    def succeeded(self, event):
+        pass
+
+    def failed(self, event):
+        pass
+
+
+async def prepare_worker(db, direction: str, sheet_id: str, size: int):
+    from app.services.sync_operations import sync_users_to_cloud
+
+    await db.authenticated_users.update_one(
+        {"email": BENCH_EMAIL},
+        {"$set": {
+            "name": "Sync Benchmark",
+            "access_token": "bench-token",
+            "refresh_token": "bench-refresh-token",
+            "created_at": datetime.utcnow()
+        }},
+        upsert=True
+    )
+
+    if direction == "incremental":
+        await sync_users_to_cloud(db, BENCH_EMAIL, sheet_id, mode="incremental")
+        changed = max(1, int(size * INCREMENTAL_CHANGE_RATIO))
+        ids = [user["_id"] async for user in db.users.aggregate([{"$sample": {"size": changed}}, {"$project": {"_id": 1}}])]
+        await db.users.update_many({"_id": {"$in": ids}}, {"$set": {"updated_at": datetime.utcnow()}})
+
+    if direction == "from-cloud":
+        await db.sheet_row_snapshots.delete_many({"sheet_id": sheet_id})
+
+
+async def run_worker(direction: str, sheet_id: str, size: int) -> dict:
+    counter = CommandCounter()
+    monitoring.register(counter)
+
+    from app.database import close_mongo_connection, connect_to_mongo, get_database, wait_for_indexes
+    from app.services.sync_operations import sync_users_from_cloud, sync_users_to_cloud
+
+    await connect_to_mongo()
+    await wait_for_indexes()
+    db = get_database()
+    await prepare_worker(db, direction, sheet_id, size)
+
+    counter.commands.clear()
+    error = None
+    result = {}
+    started = time.perf_counter()
+    try:
+        if direction == "from-cloud":
+            result = await sync_users_from_cloud(db, BENCH_EMAIL, sheet_id, force=True)
+        else:
+            result = await sync_users_to_cloud(db, BENCH_EMAIL, sheet_id, mode=direction)
+    except Exception as e:
+        error = str(getattr(e, "detail", None) or e)
+    wall_seconds = time.perf_counter() - started
+
+    await close_mongo_connection()
+
+    return {
+        "wall_seconds": wall_seconds,
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        "mongo_ops": sum(counter.commands.values()),
+        "mongo_ops_by_command": dict(counter.commands),
+        "rows": result.get("synced_count", result.get("total_processed", 0)) if result else 0,
+        "error": error
+    }
+
+
+def prefill_sheet(spreadsheet, users: list):
+    from app.services.sheets_service import SHEET_HEADERS, user_to_row
+
+    spreadsheet.write("Users!A1", [SHEET_HEADERS])
+    spreadsheet.write("Users!A2", [user_to_row(user) for user in users])
+
+
+def run_direction(emulator: SheetsEmulator, spreadsheet, direction: str, size: int) -> dict:
+    calls_before = len(emulator.calls)
+    throttled_before = len(emulator.throttled)
+
+    env = {**os.environ, "SHEETS_API_ENDPOINT": emulator.endpoint}
+    output = subprocess.run(
+        [sys.executable, "-m", "benchmarks.bench_sync", "--worker", direction,
+         "--sheet-id", spreadsheet.spreadsheet_id, "--size", str(size)],
+        env=env,
+        capture_output=True,
+        text=True
+    )
+    if output.returncode != 0:
+        raise RuntimeError(f"Benchmark worker failed:\n{output.stderr}")
+
+    stats = json.loads(output.stdout.strip().splitlines()[-1])
+    calls = emulator.calls[calls_before:]
+    stats["sheets_calls"] = len(calls)
+    stats["sheets_calls_by_method"] = dict(Counter(method for method, _ in calls))
+    stats["sheets_throttled"] = len(emulator.throttled) - throttled_before
+    stats["rows_per_second"] = stats["rows"] / stats["wall_seconds"] if stats["wall_seconds"] else 0.0
+    return stats
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Sync engine benchmark against the local Sheets emulator")
+    parser.add_argument("--sizes", default="1000,10000,100000,500000", help="Comma-separated row counts")
+    parser.add_argument("--directions", default=",".join(DIRECTIONS))
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds added to every Sheets response")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="Share of Sheets requests answered with 429")
+    parser.add_argument("--retry-after", type=float, default=None, help="Retry-After seconds sent with 429s")
+    parser.add_argument("--mongodb-uri", default=os.environ["MONGODB_URI"])
+    parser.add_argument("--output", default="bench_sync_output.json")
+    parser.add_argument("--worker", choices=DIRECTIONS, help=argparse.SUPPRESS)
+    parser.add_argument("--sheet-id", help=argparse.SUPPRESS)
+    parser.add_argument("--size", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(await run_worker(args.worker, args.sheet_id, args.size)))
+        return
+
+    os.environ["MONGODB_URI"] = args.mongodb_uri
+    mongo = AsyncIOMotorClient(args.mongodb_uri)
+    db = mongo.get_default_database()
+    emulator = SheetsEmulator(
+        latency=args.latency,
+        throttle_rate=args.throttle_rate,
+        retry_after=args.retry_after,
+        seed=1234
+    ).start()
+
+    report = {
+        "commit": git_commit(),
+        "started_at": datetime.utcnow().isoformat(),
+        "latency_seconds": args.latency,
+        "throttle_rate": args.throttle_rate,
+        "results": {}
+    }
+
+    try:
+        for size in [int(value) for value in args.sizes.split(",")]:
+            await seed_users(db, size)
+            results = report["results"][str(size)] = {}
+
+            for direction in args.directions.split(","):
+                spreadsheet = emulator.create_spreadsheet(f"bench-{size}-{direction}")
+                if direction == "from-cloud":
+                    prefill_sheet(spreadsheet, await db.users.find({}).to_list(length=None))
+
+                stats = results[direction] = await asyncio.to_thread(run_direction, emulator, spreadsheet, direction, size)
+                emulator.spreadsheets.pop(spreadsheet.spreadsheet_id, None)
+                await db.sheet_rows.delete_many({"sheet_id": spreadsheet.spreadsheet_id})
+                await db.sheet_sync_state.delete_many({"_id": spreadsheet.spreadsheet_id})
+
+                print(
+                    f"{size:>7} {direction:<11} {stats['wall_seconds']:8.2f} s  {stats['rows_per_second']:10.0f} rows/s  "
+                    f"rss {stats['peak_rss_mb']:7.1f} MB  sheets {stats['sheets_calls']:5d} calls "
+                    f"({stats['sheets_throttled']} throttled)  mongo {stats['mongo_ops']:6d} ops"
+                    + (f"  error: {stats['error']}" if stats["error"] else "")
+                )
+    finally:
+        emulator.stop()
+        mongo.close()
+
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"wrote {args.output}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,67 @@
+import os
+import statistics
+import subprocess
+from datetime import datetime, timedelta
+
+BENCH_ENV = {
+    "MONGODB_URI": "mongodb://localhost:27017/user_management_bench",
+    "GOOGLE_CLIENT_ID": "bench",
+    "GOOGLE_CLIENT_SECRET": "bench",
+    "OAUTH_REDIRECT_URL": "http://localhost/callback",
+    "SECRET_KEY": "bench"
+}
+
+SEED_BATCH_SIZE = 10000
+ROLES = ["User", "Developer", "Manager", "Admin"]
+
+
+def setup_env():
+    for name, value in BENCH_ENV.items():
+        os.environ.setdefault(name, value)
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "HEAD"], text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def percentile(samples: list, pct: float) -> float:
+    ordered = sorted(samples)
+    if not ordered:
+        return 0.0
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def summarize(samples: list) -> dict:
+    return {
+        "count": len(samples),
+        "mean_ms": statistics.fmean(samples) * 1000 if samples else 0.0,
+        "p50_ms": percentile(samples, 50) * 1000,
+        "p95_ms": percentile(samples, 95) * 1000,
+        "p99_ms": percentile(samples, 99) * 1000
+    }
+
+
+async def seed_users(db, size: int):
+    current = await db.users.estimated_document_count()
+    if current == size and await db.users.count_documents({"email": {"$regex": "^seed-"}}) == size:
+        print(f"users already seeded with {size} documents")
+        return
+
+    await db.users.delete_many({})
+    started = datetime(2020, 1, 1)
+    for start in range(0, size, SEED_BATCH_SIZE):
+        await db.users.insert_many([
+            {
+                "name": f"Seed User {i}",
+                "email": f"seed-{i}@example.com",
+                "role": ROLES[i % len(ROLES)],
+                "created_at": started + timedelta(seconds=i),
+                "updated_at": started + timedelta(seconds=i)
+            }
+            for i in range(start, min(start + SEED_BATCH_SIZE, size))
+        ], ordered=False)
+    print(f"seeded {size} users")
@@ -0,0 +1,33 @@
+import argparse
+import json
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare two bench_http JSON reports")
+    parser.add_argument("baseline")
+    parser.add_argument("candidate")
+    args = parser.parse_args()
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.candidate) as f:
+        candidate = json.load(f)
+
+    print(f"baseline  {baseline['commit']}")
+    print(f"candidate {candidate['commit']}")
+
+    for size, scenarios in candidate["results"].items():
+        for name, stats in scenarios.items():
+            before = baseline["results"].get(size, {}).get(name)
+            if not before:
+                continue
+            rps_change = (stats["rps"] / before["rps"] - 1) * 100 if before["rps"] else 0.0
+            p99_change = (stats["p99_ms"] / before["p99_ms"] - 1) * 100 if before["p99_ms"] else 0.0
+            print(
+                f"{size:>8} {name:<17} rps {before['rps']:9.1f} -> {stats['rps']:9.1f} ({rps_change:+6.1f}%)  "
+                f"p99 {before['p99_ms']:8.2f} -> {stats['p99_ms']:8.2f} ms ({p99_change:+6.1f}%)"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,13 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.database import connect_to_mongo, close_mongo_connection
-from app.routers import auth, users, sync
+from app.metrics import PrometheusMiddleware, metrics_response
+from app.profiling import ProfilingMiddleware
+from app.routers import auth, users, sync, admin
+from app.services.sheets_client import client_pool, shutdown_executor
+from app.services.live_sync import live_sync_worker
+from app.services.sync_jobs import sync_job_worker
+from app.services.user_stats import role_stats_reconciler
 from app.config import settings
 
 app = FastAPI(
@@ -18,15 +24,32 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+if settings.profiling_enabled:
+    app.add_middleware(ProfilingMiddleware)
+
+if settings.metrics_enabled:
+    app.add_middleware(PrometheusMiddleware)
+
 
 @app.on_event("startup")
 async def startup_event():
     await connect_to_mongo()
+    if settings.live_sync_enabled:
+        live_sync_worker.start()
+    if settings.sync_jobs_enabled:
+        sync_job_worker.start()
+    if settings.role_stats_reconcile_seconds > 0:
+        role_stats_reconciler.start()
 
 
 @app.on_event("shutdown")
 async def shutdown_event():
+    await role_stats_reconciler.stop()
+    await sync_job_worker.stop()
+    await live_sync_worker.stop()
     await close_mongo_connection()
+    client_pool.clear()
+    shutdown_executor()
 
 
 @app.get("/")
@@ -43,9 +66,16 @@ async def health_check():
     return {"status": "healthy"}
 
 
+if settings.metrics_enabled:
+    @app.get("/metrics", include_in_schema=False)
+    async def metrics():
+        return metrics_response()
+
+
 app.include_router(auth.router)
 app.include_router(users.router)
 app.include_router(sync.router)
+app.include_router(admin.router)
 
 
 if __name__ == "__main__":
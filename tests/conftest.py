@@ -4,7 +4,18 @@ from motor.motor_asyncio import AsyncIOMotorClient
 from httpx import AsyncClient
 from main import app
 from app.config import settings
-from app.database import connect_to_mongo
+from app.database import connect_to_mongo, wait_for_indexes
+from app.auth import credentials_cache
+from app.services.sheets_client import client_pool
+from app.services.sheets_throttle import sheets_throttle
+from tests.sheets_emulator import SheetsEmulator
+
+SHEETS_QUOTA_SETTINGS = [
+    "sheets_user_read_requests_per_minute",
+    "sheets_user_write_requests_per_minute",
+    "sheets_project_read_requests_per_minute",
+    "sheets_project_write_requests_per_minute"
+]
 
 
 @pytest.fixture(scope="session")
@@ -19,11 +30,23 @@ async def test_db():
     test_client = AsyncIOMotorClient(settings.mongodb_uri)
     test_database = test_client.get_default_database()
     await connect_to_mongo()
+    await wait_for_indexes()
 
     yield test_database
 
     await test_database.users.delete_many({})
     await test_database.authenticated_users.delete_many({})
+    await test_database.sheet_rows.delete_many({})
+    await test_database.sheet_sync_state.delete_many({})
+    await test_database.sheet_row_snapshots.delete_many({})
+    await test_database.sync_jobs.delete_many({})
+    await test_database.sync_locks.delete_many({})
+    await test_database.live_sync_sheets.delete_many({})
+    await test_database.revoked_sessions.delete_many({})
+    await test_database.user_counters.delete_many({})
+    await test_database.user_tombstones.delete_many({})
+    await test_database.request_profiles.drop()
+    credentials_cache.clear()
 
 
 @pytest.fixture
@@ -50,3 +73,23 @@ def mock_auth_user():
         "access_token": "mock_token",
         "refresh_token": "mock_refresh_token"
     }
+
+
+@pytest.fixture
+def sheets_emulator():
+    emulator = SheetsEmulator().start()
+    overrides = {"sheets_api_endpoint": emulator.endpoint, "sheets_backoff_base_seconds": 0.01}
+    overrides.update({name: 60000 for name in SHEETS_QUOTA_SETTINGS})
+    previous = {name: getattr(settings, name) for name in overrides}
+    for name, value in overrides.items():
+        setattr(settings, name, value)
+    client_pool.clear()
+    sheets_throttle.reset()
+
+    yield emulator
+
+    for name, value in previous.items():
+        setattr(settings, name, value)
+    client_pool.clear()
+    sheets_throttle.reset()
+    emulator.stop()
@@ -0,0 +1,235 @@
+import json
+import random
+import re
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import unquote, urlparse
+
+_RANGE_RE = re.compile(r"^(?:(?P<sheet>[^!]+)!)?(?P<c1>[A-Z]+)(?P<r1>\d*)(?::(?P<c2>[A-Z]+)(?P<r2>\d*))?$")
+
+
+def _column_index(letters: str) -> int:
+    index = 0
+    for letter in letters:
+        index = index * 26 + (ord(letter) - ord('A') + 1)
+    return index - 1
+
+
+def parse_a1(a1_range: str):
+    match = _RANGE_RE.match(a1_range)
+    if not match:
+        raise ValueError(f"Unable to parse range: {a1_range}")
+
+    sheet = match.group('sheet') or 'Sheet1'
+    col_start = _column_index(match.group('c1'))
+    row_start = int(match.group('r1')) - 1 if match.group('r1') else 0
+    col_end = _column_index(match.group('c2')) if match.group('c2') else col_start
+    if match.group('r2'):
+        row_end = int(match.group('r2')) - 1
+    elif match.group('c2') or not match.group('r1'):
+        row_end = None
+    else:
+        row_end = row_start
+    return sheet, row_start, row_end, col_start, col_end
+
+
+class Spreadsheet:
+    def __init__(self, spreadsheet_id: str, title: str, tabs: list):
+        self.spreadsheet_id = spreadsheet_id
+        self.title = title
+        self.tabs = {tab: [] for tab in tabs}
+
+    def write(self, a1_range: str, values: list):
+        sheet, row_start, _, col_start, _ = parse_a1(a1_range)
+        grid = self.tabs.setdefault(sheet, [])
+        for offset, row_values in enumerate(values):
+            row_index = row_start + offset
+            while len(grid) <= row_index:
+                grid.append([])
+            row = grid[row_index]
+            while len(row) < col_start + len(row_values):
+                row.append('')
+            for col_offset, value in enumerate(row_values):
+                row[col_start + col_offset] = '' if value is None else str(value)
+        return len(values)
+
+    def clear(self, a1_range: str):
+        sheet, row_start, row_end, col_start, col_end = parse_a1(a1_range)
+        grid = self.tabs.setdefault(sheet, [])
+        last_row = len(grid) - 1 if row_end is None else min(row_end, len(grid) - 1)
+        for row_index in range(row_start, last_row + 1):
+            row = grid[row_index]
+            for col_index in range(col_start, min(col_end + 1, len(row))):
+                row[col_index] = ''
+
+    def read(self, a1_range: str):
+        sheet, row_start, row_end, col_start, col_end = parse_a1(a1_range)
+        grid = self.tabs.get(sheet, [])
+        last_row = len(grid) - 1 if row_end is None else min(row_end, len(grid) - 1)
+        values = []
+        for row_index in range(row_start, last_row + 1):
+            row = grid[row_index][col_start:col_end + 1]
+            while row and row[-1] == '':
+                row.pop()
+            values.append(row)
+        while values and not values[-1]:
+            values.pop()
+        return values
+
+
+class SheetsEmulator:
+    """In-memory stand-in for the subset of the Sheets v4 REST API used by the service.
+
+    ``latency`` delays every response, ``throttle_rate`` answers that share of
+    requests with 429 RESOURCE_EXHAUSTED, and ``fail_next`` forces specific
+    errors for the next requests.
+    """
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 0, latency: float = 0.0,
+                 throttle_rate: float = 0.0, retry_after: float = None, seed: int = None):
+        self.latency = latency
+        self.throttle_rate = throttle_rate
+        self.retry_after = retry_after
+        self.spreadsheets = {}
+        self.calls = []
+        self.throttled = []
+        self._forced_errors = []
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._thread = None
+
+    @property
+    def endpoint(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def create_spreadsheet(self, title: str = 'Test', tabs: list = None) -> Spreadsheet:
+        spreadsheet = Spreadsheet(uuid.uuid4().hex, title, tabs or ['Users'])
+        self.spreadsheets[spreadsheet.spreadsheet_id] = spreadsheet
+        return spreadsheet
+
+    def fail_next(self, count: int = 1, status: int = 429):
+        with self._lock:
+            self._forced_errors.extend([status] * count)
+
+    def injected_error(self, method: str, path: str):
+        if self._forced_errors:
+            status = self._forced_errors.pop(0)
+        elif self.throttle_rate and self._random.random() < self.throttle_rate:
+            status = 429
+        else:
+            return None
+
+        self.throttled.append((method, path, status))
+        if status == 429:
+            return status, {'error': {
+                'code': 429,
+                'message': "Quota exceeded for quota metric 'Write requests' of service 'sheets.googleapis.com'.",
+                'status': 'RESOURCE_EXHAUSTED'
+            }}
+        return status, {'error': {'code': status, 'message': 'The service is currently unavailable.', 'status': 'UNAVAILABLE'}}
+
+    def dispatch(self, method: str, path: str, body: dict):
+        parts = [unquote(part) for part in path.strip('/').split('/')]
+        if parts[:2] != ['v4', 'spreadsheets']:
+            return 404, {'error': {'code': 404, 'message': 'Not found'}}
+
+        if method == 'POST' and len(parts) == 2:
+            self.calls.append(('spreadsheets.create', None))
+            tabs = [sheet['properties']['title'] for sheet in body.get('sheets', [])]
+            spreadsheet = self.create_spreadsheet(body.get('properties', {}).get('title', ''), tabs)
+            return 200, {
+                'spreadsheetId': spreadsheet.spreadsheet_id,
+                'properties': {'title': spreadsheet.title},
+                'sheets': [
+                    {'properties': {'sheetId': index, 'title': tab}}
+                    for index, tab in enumerate(spreadsheet.tabs)
+                ]
+            }
+
+        spreadsheet_id, _, action = parts[2].partition(':')
+        spreadsheet = self.spreadsheets.get(spreadsheet_id)
+        if spreadsheet is None:
+            return 404, {'error': {'code': 404, 'message': 'Requested entity was not found.'}}
+
+        if len(parts) == 3 and action == 'batchUpdate':
+            self.calls.append(('spreadsheets.batchUpdate', spreadsheet_id))
+            return 200, {'spreadsheetId': spreadsheet_id, 'replies': [{} for _ in body.get('requests', [])]}
+
+        if len(parts) == 4 and parts[3] == 'values:batchUpdate':
+            self.calls.append(('values.batchUpdate', spreadsheet_id))
+            rows = 0
+            for data in body.get('data', []):
+                rows += spreadsheet.write(data['range'], data.get('values', []))
+            return 200, {'spreadsheetId': spreadsheet_id, 'totalUpdatedRows': rows}
+
+        if len(parts) == 5 and parts[3] == 'values':
+            a1_range, verb = parts[4], ''
+            if a1_range.endswith(':clear'):
+                a1_range, verb = a1_range[:-len(':clear')], 'clear'
+            if method == 'GET':
+                self.calls.append(('values.get', spreadsheet_id))
+                return 200, {'range': a1_range, 'majorDimension': 'ROWS', 'values': spreadsheet.read(a1_range)}
+            if method == 'PUT':
+                self.calls.append(('values.update', spreadsheet_id))
+                rows = spreadsheet.write(a1_range, body.get('values', []))
+                return 200, {'spreadsheetId': spreadsheet_id, 'updatedRange': a1_range, 'updatedRows': rows}
+            if method == 'POST' and verb == 'clear':
+                self.calls.append(('values.clear', spreadsheet_id))
+                spreadsheet.clear(a1_range)
+                return 200, {'spreadsheetId': spreadsheet_id, 'clearedRange': a1_range}
+
+        return 404, {'error': {'code': 404, 'message': 'Not found'}}
+
+    def _handler_class(self):
+        emulator = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def _handle(self):
+                length = int(self.headers.get('Content-Length') or 0)
+                raw = self.rfile.read(length) if length else b''
+                body = json.loads(raw) if raw else {}
+
+                if emulator.latency:
+                    time.sleep(emulator.latency)
+
+                path = urlparse(self.path).path
+                with emulator._lock:
+                    error = emulator.injected_error(self.command, path)
+                    status, payload = error or emulator.dispatch(self.command, path, body)
+
+                data = json.dumps(payload).encode('utf-8')
+                self.send_response(status)
+                if error and emulator.retry_after is not None:
+                    self.send_header('Retry-After', str(emulator.retry_after))
+                self.send_header('Content-Type', 'application/json; charset=UTF-8')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            do_GET = do_POST = do_PUT = _handle
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
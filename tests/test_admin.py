@@ -0,0 +1,102 @@
+import pytest
+from httpx import AsyncClient
+from app.config import settings
+from app.sessions import create_session_token
+
+
+@pytest.fixture
+def admin_user(mock_auth_user):
+    previous_admins = settings.admin_emails
+    settings.admin_emails = mock_auth_user["email"]
+    yield mock_auth_user
+    settings.admin_emails = previous_admins
+
+
+@pytest.mark.asyncio
+async def test_index_report_lists_declared_indexes(async_client: AsyncClient, test_db, admin_user):
+    await test_db.authenticated_users.insert_one(admin_user)
+
+    response = await async_client.get(
+        "/admin/indexes",
+        headers={"Authorization": f"Bearer {create_session_token(admin_user['email'])}"}
+    )
+
+    assert response.status_code == 200
+    users = response.json()["users"]
+    names = {index["name"] for index in users["indexes"]}
+    assert {"email_1", "created_at_-1__id_-1", "updated_at_1"} <= names
+    assert users["missing"] == []
+
+
+@pytest.mark.asyncio
+async def test_index_sync_reports_mismatched_indexes_per_collection(async_client: AsyncClient, test_db, admin_user):
+    from pymongo import IndexModel
+    from app.database import index_registry, register_indexes
+
+    await test_db.authenticated_users.insert_one(admin_user)
+    headers = {"Authorization": f"Bearer {create_session_token(admin_user['email'])}"}
+    await test_db.index_conflicts.create_index("kind", name="kind_1")
+    register_indexes("index_conflicts", IndexModel("kind", unique=True))
+    register_indexes("index_fresh", IndexModel("kind"))
+
+    try:
+        response = await async_client.post("/admin/indexes/sync", headers=headers)
+        data = response.json()
+        assert list(data["failed"]) == ["index_conflicts"]
+        assert data["created"]["index_fresh"] == ["kind_1"]
+
+        response = await async_client.get("/admin/indexes", headers=headers)
+        assert response.json()["index_conflicts"]["mismatched"] == ["kind_1"]
+    finally:
+        index_registry.pop("index_conflicts")
+        index_registry.pop("index_fresh")
+        await test_db.index_conflicts.drop()
+        await test_db.index_fresh.drop()
+
+
+@pytest.mark.asyncio
+async def test_admin_endpoints_require_admin(async_client: AsyncClient, test_db, mock_auth_user):
+    await test_db.authenticated_users.insert_one(mock_auth_user)
+
+    response = await async_client.get(
+        "/admin/indexes",
+        headers={"Authorization": f"Bearer {create_session_token(mock_auth_user['email'])}"}
+    )
+
+    assert response.status_code == 403
+
+
+@pytest.mark.asyncio
+async def test_profiling_middleware_stores_admin_requested_profiles(async_client: AsyncClient, test_db, admin_user):
+    from main import app
+    from app.profiling import ProfilingMiddleware
+
+    admin_headers = {"Authorization": f"Bearer {create_session_token(admin_user['email'])}"}
+
+    async with AsyncClient(app=ProfilingMiddleware(app, sample_rate=0.0), base_url="http://test") as client:
+        await client.get("/users", headers=admin_headers)
+        assert await test_db.request_profiles.count_documents({}) == 0
+
+        response = await client.get("/users", headers={**admin_headers, "X-Profile": "1"})
+        assert response.status_code == 200
+
+        user_headers = {"Authorization": f"Bearer {create_session_token('someone@example.com')}", "X-Profile": "1"}
+        await client.get("/users", headers=user_headers)
+
+        revoked_headers = {"Authorization": f"Bearer {create_session_token(admin_user['email'])}"}
+        assert (await client.post("/auth/logout", headers=revoked_headers)).status_code == 200
+        await client.get("/users", headers={**revoked_headers, "X-Profile": "1"})
+
+    response = await async_client.get("/admin/profiles", headers=admin_headers)
+    profiles = response.json()["profiles"]
+    assert len(profiles) == 1
+    assert (profiles[0]["path"], profiles[0]["status"], profiles[0]["trigger"]) == ("/users", 200, "header")
+    assert profiles[0]["concurrent_requests"] == 0
+
+    detail = (await async_client.get(f"/admin/profiles/{profiles[0]['id']}", headers=admin_headers)).json()
+    assert "cumulative" in detail["summary"]
+
+    response = await async_client.get(f"/admin/profiles/{profiles[0]['id']}/pstats", headers=admin_headers)
+    assert response.headers["content-type"] == "application/octet-stream"
+    assert len(response.content) > 0
+
@@ -1,4 +1,7 @@
+import asyncio
+import time
 import pytest
+from datetime import datetime, timedelta
 from httpx import AsyncClient
 
 
@@ -33,3 +36,110 @@ async def test_get_nonexistent_user_info(async_client: AsyncClient):
     )
 
     assert response.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_session_token_authenticates_without_stored_user(async_client: AsyncClient, test_db):
+    from app.sessions import create_session_token
+
+    token = create_session_token("session@example.com", "Session User")
+
+    response = await async_client.get("/users", headers={"Authorization": f"Bearer {token}"})
+
+    assert response.status_code == 200
+
+
+@pytest.mark.asyncio
+async def test_tampered_and_expired_session_tokens_are_rejected(async_client: AsyncClient, test_db):
+    from app.sessions import create_session_token
+
+    token = create_session_token("session@example.com")
+    body, signature = token.split(".")
+    tampered = f"{body[:-2]}xx.{signature}"
+    expired = create_session_token("session@example.com", ttl_seconds=-1)
+
+    for bad_token in (tampered, expired, "caf\u00e9.signature"):
+        header = f"Bearer {bad_token}".encode("latin-1")
+        response = await async_client.get("/users", headers={"Authorization": header})
+        assert response.status_code == 401
+
+
+@pytest.mark.asyncio
+async def test_logout_revokes_session_token(async_client: AsyncClient, test_db):
+    from app.sessions import create_session_token
+
+    headers = {"Authorization": f"Bearer {create_session_token('session@example.com')}"}
+
+    response = await async_client.post("/auth/logout", headers=headers)
+    assert response.status_code == 200
+
+    response = await async_client.get("/users", headers=headers)
+    assert response.status_code == 401
+
+
+@pytest.mark.asyncio
+async def test_legacy_email_tokens_require_opt_in(async_client: AsyncClient, test_db, mock_auth_user):
+    from app.config import settings
+
+    await test_db.authenticated_users.insert_one(mock_auth_user)
+    headers = {"Authorization": f"Bearer {mock_auth_user['email']}"}
+
+    response = await async_client.get("/users", headers=headers)
+    assert response.status_code == 401
+
+    settings.legacy_email_tokens = True
+    try:
+        response = await async_client.get("/users", headers=headers)
+    finally:
+        settings.legacy_email_tokens = False
+    assert response.status_code == 200
+
+
+@pytest.mark.asyncio
+async def test_expiring_credentials_refresh_once_and_persist(test_db, mock_auth_user, monkeypatch):
+    from google.oauth2.credentials import Credentials
+    from app.auth import get_user_credentials
+
+    await test_db.authenticated_users.insert_one({
+        **mock_auth_user,
+        "token_expiry": datetime.utcnow() + timedelta(seconds=30)
+    })
+
+    refreshes = []
+
+    def fake_refresh(self, request):
+        refreshes.append(request)
+        time.sleep(0.05)
+        self.token = "refreshed_token"
+        self.expiry = datetime.utcnow() + timedelta(hours=1)
+
+    monkeypatch.setattr(Credentials, "refresh", fake_refresh)
+
+    results = await asyncio.gather(*[get_user_credentials(mock_auth_user["email"]) for _ in range(5)])
+
+    assert len(refreshes) == 1
+    assert all(credentials.token == "refreshed_token" for credentials in results)
+    stored = await test_db.authenticated_users.find_one({"email": mock_auth_user["email"]})
+    assert stored["access_token"] == "refreshed_token"
+
+
+@pytest.mark.asyncio
+async def test_credentials_cache_is_bounded(test_db, mock_auth_user):
+    from app.auth import CredentialsCache
+
+    emails = [f"user{i}@example.com" for i in range(3)]
+    await test_db.authenticated_users.insert_many([{**mock_auth_user, "email": email} for email in emails])
+    cache = CredentialsCache(refresh_margin_seconds=300, max_size=2, ttl_seconds=60)
+
+    first = await cache.get(emails[0])
+    await cache.get(emails[1])
+    assert await cache.get(emails[0]) is first
+    await cache.get(emails[2])
+
+    assert len(cache) == 2
+    assert await cache.get(emails[0]) is first
+    assert await cache.get(emails[1]) is not None and len(cache) == 2
+
+    cache.ttl_seconds = 0
+    time.sleep(0.01)
+    assert await cache.get(emails[0]) is not first
@@ -0,0 +1,667 @@
+import asyncio
+import time
+import pytest
+from httpx import AsyncClient
+from datetime import datetime
+from app.sessions import create_session_token
+
+
+@pytest.mark.asyncio
+async def test_create_sheet(async_client: AsyncClient, test_db, mock_auth_user, sheets_emulator):
+    await test_db.authenticated_users.insert_one(mock_auth_user)
+
+    response = await async_client.post(
+        "/sync/create-sheet",
+        json={"sheet_name": "Team"},
+        headers={"Authorization": f"Bearer {create_session_token(mock_auth_user['email'])}"}
+    )
+
+    assert response.status_code == 200
+    data = response.json()
+    spreadsheet = sheets_emulator.spreadsheets[data["sheet_id"]]
+    assert spreadsheet.read("Users!A1:E1") == [["ID", "Name", "Email", "Role", "Created At"]]
+
+
+@pytest.mark.asyncio
+async def test_sync_to_cloud(async_client: AsyncClient, test_db, mock_auth_user, sheets_emulator):
+    await test_db.authenticated_users.insert_one(mock_auth_user)
+    spreadsheet = sheets_emulator.create_spreadsheet()
+
+    for i in range(3):
+        await test_db.users.insert_one({
+            "name": f"User {i}",
+            "email": f"user{i}@example.com",
+            "role": "User",
+            "created_at": datetime(2025, 1, 1, 12, 0, i)
+        })
+
+    response = await async_client.post(
+        f"/sync/{spreadsheet.spreadsheet_id}/to-cloud",
+        headers={"Authorization": f"Bearer {create_session_token(mock_auth_user['email'])}"}
+    )
+
+    assert response.status_code == 200
+    assert response.json()["synced_count"] == 3
+    rows = spreadsheet.read("Users!A2:E")
+    assert sorted(row[2] for row in rows) == ["user0@example.com", "user1@example.com", "user2@example.com"]
+
+
+@pytest.mark.asyncio
+async def test_sync_from_cloud(async_client: AsyncClient, test_db, mock_auth_user, sheets_emulator):
+    await test_db.authenticated_users.insert_one(mock_auth_user)
+    spreadsheet = sheets_emulator.create_spreadsheet()
+
+    existing = await test_db.users.insert_one({
+        "name": "Old Name",
+        "email": "old@example.com",
+        "role": "User",
+        "created_at": datetime.utcnow()
+    })
+    spreadsheet.write("Users!A2", [
+        [str(existing.inserted_id), "New Name", "old@example.com", "Admin", ""],
+        ["", "Fresh User", "fresh@example.com", "User", ""],
+    ])
+
+    response = await async_client.post(
+        f"/sync/{spreadsheet.spreadsheet_id}/from-cloud",
+        headers={"Authorization": f"Bearer {create_session_token(mock_auth_user['email'])}"}
+    )
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["inserted"] == 1
+    assert data["updated"] == 1
+    updated = await test_db.users.find_one({"_id": existing.inserted_id})
+    assert updated["name"] == "New Name"
+    assert updated["role"] == "Admin"
+
+
+@pytest.mark.asyncio
+async def test_sync_does_not_block_event_loop(async_client: AsyncClient, test_db, mock_auth_user, sheets_emulator):
+    await test_db.authenticated_users.insert_one(mock_auth_user)
+    spreadsheet = sheets_emulator.create_spreadsheet()
+    sheets_emulator.latency = 0.3
+
+    sync_task = asyncio.create_task(async_client.post(
+        f"/sync/{spreadsheet.spreadsheet_id}/from-cloud",
+        headers={"Authorization": f"Bearer {create_session_token(mock_auth_user['email'])}"}
+    ))
+    await asyncio.sleep(0.05)
+
+    started = time.perf_counter()
+    health = await async_client.get("/health")
+    elapsed = time.perf_counter() - started
+
+    assert health.status_code == 200
+    assert not sync_task.done()
+    assert elapsed < 0.2
+    assert (await sync_task).status_code == 200
+
+
+@pytest.mark.asyncio
+async def test_sheets_client_is_reused_until_credentials_change(test_db, mock_auth_user, sheets_emulator):
+    from app.auth import save_authenticated_user
+    from app.services.sheets_client import get_sheets_client
+
+    await test_db.authenticated_users.insert_one(mock_auth_user)
+
+    first = await get_sheets_client(mock_auth_user["email"])
+    second = await get_sheets_client(mock_auth_user["email"])
+    assert first is second
+
+    await save_authenticated_user(
+        email=mock_auth_user["email"],
+        name=mock_auth_user["name"],
+        profile_pic=mock_auth_user["profile_pic"],
+        access_token="rotated_token",
+        refresh_token=mock_auth_user["refresh_token"]
+    )
+
+    third = await get_sheets_client(mock_auth_user["email"])
+    assert third is not first
+
+
+@pytest.mark.asyncio
+async def test_busy_sheets_client_does_not_hold_executor_threads(sheets_emulator):
+    import threading
+    from app.config import settings
+    from app.services.sheets_client import SheetsClient, shutdown_executor
+
+    class FakeRequest:
+        methodId = "sheets.spreadsheets.values.get"
+
+        def __init__(self, release=None):
+            self.release = release
+
+        def execute(self):
+            if self.release:
+                assert self.release.wait(5)
+            return {}
+
+    release = threading.Event()
+    busy, other = SheetsClient(None, user_email="busy@example.com"), SheetsClient(None, user_email="other@example.com")
+    previous_workers = settings.sheets_max_workers
+    settings.sheets_max_workers = 2
+    shutdown_executor()
+    try:
+        first = asyncio.ensure_future(busy.execute(FakeRequest(release)))
+        second = asyncio.ensure_future(busy.execute(FakeRequest()))
+        await asyncio.sleep(0.05)
+
+        # The queued request waits on the event loop, leaving a thread free.
+        await asyncio.wait_for(other.execute(FakeRequest()), 5)
+        assert not second.done()
+
+        release.set()
+        await asyncio.wait_for(asyncio.gather(first, second), 5)
+    finally:
+        release.set()
+        settings.sheets_max_workers = previous_workers
+        shutdown_executor()
+
+
+@pytest.mark.asyncio
+async def test_sync_to_cloud_stream_writes_in_chunks(async_client: AsyncClient, test_db, mock_auth_user, sheets_emulator):
+    from app.config import settings
+
+    await test_db.authenticated_users.insert_one(mock_auth_user)
+    spreadsheet = sheets_emulator.create_spreadsheet()
+    spreadsheet.write("Users!A2", [["stale"] * 5 for _ in range(10)])
+
+    for i in range(7):
+        await test_db.users.insert_one({
+            "name": f"User {i}",
+            "email": f"user{i}@example.com",
+            "role": "User",
+            "created_at": datetime(2025, 1, 1, 12, 0, i)
+        })
+
+    previous_chunk_size = settings.sync_chunk_size
+    settings.sync_chunk_size = 3
+    try:
+        response = await async_client.post(
+            f"/sync/{spreadsheet.spreadsheet_id}/to-cloud?mode=stream",
+            headers={"Authorization": f"Bearer {create_session_token(mock_auth_user['email'])}"}
+        )
+    finally:
+        settings.sync_chunk_size = previous_chunk_size
+
+    assert response.status_code == 200
+    assert response.json()["synced_count"] == 7
+    rows = spreadsheet.read("Users!A2:E")
+    assert len(rows) == 7
+    assert sorted(row[2] for row in rows) == [f"user{i}@example.com" for i in range(7)]
+    assert [call for call, _ in sheets_emulator.calls].count("values.update") == 1 + 3
+
+
+@pytest.mark.asyncio
+async def test_sync_from_cloud_bulk_reports_row_errors(async_client: AsyncClient, test_db, mock_auth_user, sheets_emulator):
+    await test_db.authenticated_users.insert_one(mock_auth_user)
+    spreadsheet = sheets_emulator.create_spreadsheet()
+
+    first = await test_db.users.insert_one({
+        "name": "First", "email": "first@example.com", "role": "User", "created_at": datetime.utcnow()
+    })
+    await test_db.users.insert_one({
+        "name": "Second", "email": "second@example.com", "role": "User", "created_at": datetime.utcnow()
+    })
+    spreadsheet.write("Users!A2", [
+        ["", "Short row"],
+        ["", "New", "new@example.com", "User", ""],
+        ["", "New Again", "new@example.com", "Admin", ""],
+        [str(first.inserted_id), "First", "second@example.com", "User", ""],
+        ["", "No Email", "", "User", ""],
+    ])
+
+    response = await async_client.post(
+        f"/sync/{spreadsheet.spreadsheet_id}/from-cloud",
+        headers={"Authorization": f"Bearer {create_session_token(mock_auth_user['email'])}"}
+    )
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["inserted"] == 1
+    assert data["updated"] == 1
+    assert [error["row"] for error in data["errors"]] == [5]
+    new_user = await test_db.users.find_one({"email": "new@example.com"})
+    assert new_user["name"] == "New Again"
+    assert new_user["role"] == "Admin"
+
+
+@pytest.mark.asyncio
+async def test_sync_to_cloud_incremental_only_writes_changes(async_client: AsyncClient, test_db, mock_auth_user, sheets_emulator,
+                                                            monkeypatch):
+    from app.config import settings
+
+    monkeypatch.setattr(settings, "sync_watermark_margin_seconds", 0)
+    await test_db.authenticated_users.insert_one(mock_auth_user)
+    spreadsheet = sheets_emulator.create_spreadsheet()
+    headers = {"Authorization": f"Bearer {create_session_token(mock_auth_user['email'])}"}
+
+    user_ids = []
+    for i in range(4):
+        response = await async_client.post("/users", json={
+            "name": f"User {i}", "email": f"user{i}@example.com", "role": "User"
+        }, headers=headers)
+        user_ids.append(response.json()["id"])
+
+    response = await async_client.post(f"/sync/{spreadsheet.spreadsheet_id}/to-cloud?mode=incremental", headers=headers)
+    assert response.status_code == 200
+    assert response.json()["rebuilt"] is True
+    assert len(spreadsheet.read("Users!A2:E")) == 4
+
+    await async_client.put(f"/users/{user_ids[1]}", json={"role": "Admin"}, headers=headers)
+    await async_client.delete(f"/users/{user_ids[2]}", headers=headers)
+    await async_client.post("/users", json={"name": "User 4", "email": "user4@example.com", "role": "User"}, headers=headers)
+    sheets_emulator.calls.clear()
+
+    response = await async_client.post(f"/sync/{spreadsheet.spreadsheet_id}/to-cloud?mode=incremental", headers=headers)
+
+    assert response.status_code == 200
+    data = response.json()
+    assert (data["inserted"], data["modified"], data["deleted"]) == (1, 1, 1)
+    assert [call for call, _ in sheets_emulator.calls] == ["values.batchUpdate"]
+    rows = {row[0]: row for row in spreadsheet.read("Users!A2:E") if row}
+    assert rows[user_ids[1]][3] == "Admin"
+    assert user_ids[2] not in rows
+    assert sorted(row[2] for row in rows.values()) == [
+        "user0@example.com", "user1@example.com", "user3@example.com", "user4@example.com"
+    ]
+    assert len(spreadsheet.read("Users!A2:E")) == 4
+
+
+@pytest.mark.asyncio
+async def test_sync_to_cloud_incremental_picks_up_late_commits(async_client: AsyncClient, test_db, mock_auth_user, sheets_emulator):
+    await test_db.authenticated_users.insert_one(mock_auth_user)
+    spreadsheet = sheets_emulator.create_spreadsheet()
+    sheet_id = spreadsheet.spreadsheet_id
+    headers = {"Authorization": f"Bearer {create_session_token(mock_auth_user['email'])}"}
+
+    # Stamped before the first sync started but committed after it read users.
+    stamped_at = datetime.utcnow()
+    await async_client.post(f"/sync/{sheet_id}/to-cloud?mode=incremental", headers=headers)
+    user_id = (await test_db.users.insert_one({
+        "name": "Late", "email": "late@example.com", "role": "User", "created_at": stamped_at, "updated_at": stamped_at
+    })).inserted_id
+
+    response = await async_client.post(f"/sync/{sheet_id}/to-cloud?mode=incremental", headers=headers)
+    assert response.json()["inserted"] == 1
+    assert [row[0] for row in spreadsheet.read("Users!A2:E") if row] == [str(user_id)]
+
+
+@pytest.mark.asyncio
+async def test_sync_to_cloud_incremental_uses_tombstones(async_client: AsyncClient, test_db, mock_auth_user, sheets_emulator):
+    await test_db.authenticated_users.insert_one(mock_auth_user)
+    spreadsheet = sheets_emulator.create_spreadsheet()
+    sheet_id = spreadsheet.spreadsheet_id
+    headers = {"Authorization": f"Bearer {create_session_token(mock_auth_user['email'])}"}
+
+    response = await async_client.post("/users/bulk", json=[
+        {"name": f"User {i}", "email": f"user{i}@example.com", "role": "User"} for i in range(3)
+    ], headers=headers)
+    user_ids = [item["id"] for item in response.json()["results"]]
+    await async_client.post(f"/sync/{sheet_id}/to-cloud?mode=incremental", headers=headers)
+
+    await async_client.request("DELETE", "/users/bulk", json={"ids": user_ids[:2]}, headers=headers)
+    assert await test_db.user_tombstones.count_documents({}) == 2
+
+    response = await async_client.post(f"/sync/{sheet_id}/to-cloud?mode=incremental", headers=headers)
+    assert response.json()["deleted"] == 2
+    assert [row[0] for row in spreadsheet.read("Users!A2:E") if row] == [user_ids[2]]
+
+    await test_db.sheet_sync_state.update_one({"_id": sheet_id}, {"$set": {"watermark": datetime(2000, 1, 1)}})
+    response = await async_client.post(f"/sync/{sheet_id}/to-cloud?mode=incremental", headers=headers)
+    assert response.json()["rebuilt"] is True
+
+
+@pytest.mark.asyncio
+async def test_sync_from_cloud_skips_unchanged_rows(async_client: AsyncClient, test_db, mock_auth_user, sheets_emulator):
+    await test_db.authenticated_users.insert_one(mock_auth_user)
+    spreadsheet = sheets_emulator.create_spreadsheet()
+    headers = {"Authorization": f"Bearer {create_session_token(mock_auth_user['email'])}"}
+    spreadsheet.write("Users!A2", [
+        ["", "Alpha", "alpha@example.com", "User", ""],
+        ["", "Beta", "beta@example.com", "User", ""],
+    ])
+
+    first = await async_client.post(f"/sync/{spreadsheet.spreadsheet_id}/from-cloud", headers=headers)
+    assert first.json()["changed"] == 2
+
+    second = await async_client.post(f"/sync/{spreadsheet.spreadsheet_id}/from-cloud", headers=headers)
+    assert (second.json()["changed"], second.json()["unchanged"]) == (0, 2)
+    assert second.json()["updated"] == 0
+
+    spreadsheet.write("Users!B3", [["Beta Prime"]])
+    third = await async_client.post(f"/sync/{spreadsheet.spreadsheet_id}/from-cloud", headers=headers)
+    assert (third.json()["changed"], third.json()["updated"]) == (1, 1)
+    assert (await test_db.users.find_one({"email": "beta@example.com"}))["name"] == "Beta Prime"
+
+    spreadsheet.write("Users!D3", [["Manager"]])
+    await async_client.post(f"/sync/{spreadsheet.spreadsheet_id}/from-cloud", headers=headers)
+    stats = (await async_client.get("/users/stats", headers=headers)).json()
+    assert (stats["total"], stats["roles"]) == (2, {"Manager": 1, "User": 1})
+
+
+@pytest.mark.asyncio
+async def test_sheets_quota_errors_are_retried(async_client: AsyncClient, test_db, mock_auth_user, sheets_emulator):
+    await test_db.authenticated_users.insert_one(mock_auth_user)
+    spreadsheet = sheets_emulator.create_spreadsheet()
+    headers = {"Authorization": f"Bearer {create_session_token(mock_auth_user['email'])}"}
+    await test_db.users.insert_one({
+        "name": "User", "email": "user@example.com", "role": "User", "created_at": datetime(2025, 1, 1)
+    })
+
+    sheets_emulator.retry_after = 0.05
+    sheets_emulator.fail_next(1)
+    sheets_emulator.fail_next(1, status=503)
+    started = time.monotonic()
+    response = await async_client.post(f"/sync/{spreadsheet.spreadsheet_id}/to-cloud", headers=headers)
+
+    assert response.status_code == 200
+    assert [status for _, _, status in sheets_emulator.throttled] == [429, 503]
+    assert time.monotonic() - started >= 0.1
+    assert spreadsheet.read("Users!A2:E")[0][2] == "user@example.com"
+
+
+@pytest.mark.asyncio
+async def test_spreadsheet_create_is_retried_only_on_quota_errors(async_client: AsyncClient, test_db, mock_auth_user, sheets_emulator):
+    await test_db.authenticated_users.insert_one(mock_auth_user)
+    headers = {"Authorization": f"Bearer {create_session_token(mock_auth_user['email'])}"}
+
+    sheets_emulator.fail_next(1, status=503)
+    response = await async_client.post("/sync/create-sheet", json={"sheet_name": "Users"}, headers=headers)
+    assert response.status_code == 500
+    assert sheets_emulator.spreadsheets == {}
+
+    sheets_emulator.fail_next(1)
+    response = await async_client.post("/sync/create-sheet", json={"sheet_name": "Users"}, headers=headers)
+    assert response.status_code == 200
+    assert len(sheets_emulator.spreadsheets) == 1
+
+
+@pytest.mark.asyncio
+async def test_persistent_sheets_throttling_returns_429(async_client: AsyncClient, test_db, mock_auth_user, sheets_emulator):
+    from app.config import settings
+
+    await test_db.authenticated_users.insert_one(mock_auth_user)
+    spreadsheet = sheets_emulator.create_spreadsheet()
+    headers = {"Authorization": f"Bearer {create_session_token(mock_auth_user['email'])}"}
+    await test_db.users.insert_one({
+        "name": "User", "email": "user@example.com", "role": "User", "created_at": datetime(2025, 1, 1)
+    })
+
+    sheets_emulator.retry_after = 0
+    sheets_emulator.fail_next(settings.sheets_max_retries + 1)
+    previous_base = settings.sheets_backoff_base_seconds
+    settings.sheets_backoff_base_seconds = 0.0
+    try:
+        response = await async_client.post(f"/sync/{spreadsheet.spreadsheet_id}/to-cloud", headers=headers)
+    finally:
+        settings.sheets_backoff_base_seconds = previous_base
+
+    assert response.status_code == 429
+    assert "quota" in response.json()["detail"]
+    assert response.headers["Retry-After"] == "0"
+    assert len(sheets_emulator.throttled) == settings.sheets_max_retries + 1
+
+
+@pytest.mark.asyncio
+async def test_token_bucket_and_adaptive_concurrency():
+    from app.services.sheets_throttle import AdaptiveConcurrency, TokenBucket
+
+    bucket = TokenBucket(requests_per_minute=60)
+    waits = [bucket.reserve() for _ in range(12)]
+    assert waits[:10] == [0.0] * 10
+    assert 0.9 < waits[10] < 1.1 and 1.9 < waits[11] < 2.1
+
+    limiter = AdaptiveConcurrency(maximum=4)
+    for _ in range(4):
+        await limiter.acquire()
+    blocked = asyncio.ensure_future(limiter.acquire())
+    await asyncio.sleep(0)
+    assert not blocked.done()
+
+    limiter.release(throttled=True)
+    assert limiter.limit == 2.0
+    await asyncio.sleep(0)
+    assert not blocked.done()
+
+    limiter.release()
+    limiter.release()
+    await asyncio.sleep(0)
+    assert blocked.done()
+    assert limiter.in_flight == 2
+
+
+def test_live_sync_coalesces_changes_per_user():
+    from bson import ObjectId
+    from app.services.live_sync import coalesce_change
+
+    kept, removed = ObjectId(), ObjectId()
+    pending = {}
+    for change in [
+        {"operationType": "insert", "documentKey": {"_id": kept}, "fullDocument": {"_id": kept, "name": "A"}},
+        {"operationType": "update", "documentKey": {"_id": kept}, "fullDocument": {"_id": kept, "name": "B"}},
+        {"operationType": "insert", "documentKey": {"_id": removed}, "fullDocument": {"_id": removed}},
+        {"operationType": "delete", "documentKey": {"_id": removed}},
+        {"operationType": "drop"},
+    ]:
+        coalesce_change(pending, change)
+
+    assert pending == {kept: {"_id": kept, "name": "B"}, removed: None}
+
+
+@pytest.mark.asyncio
+async def test_live_sync_registration_is_owned_by_its_user(async_client: AsyncClient, test_db):
+    owner = {"Authorization": f"Bearer {create_session_token('owner@example.com')}"}
+    other = {"Authorization": f"Bearer {create_session_token('other@example.com')}"}
+
+    response = await async_client.post("/sync/sheet-live/live", headers=owner)
+    assert response.status_code == 200
+
+    response = await async_client.post("/sync/sheet-live/live", headers=other)
+    assert response.status_code == 403
+    response = await async_client.delete("/sync/sheet-live/live", headers=other)
+    assert response.status_code == 404
+
+    registration = await test_db.live_sync_sheets.find_one({"_id": "sheet-live"})
+    assert registration["user_email"] == "owner@example.com"
+
+    response = await async_client.delete("/sync/sheet-live/live", headers=owner)
+    assert response.status_code == 200
+
+
+@pytest.mark.asyncio
+async def test_only_one_live_sync_worker_watches(test_db, monkeypatch):
+    from app.services.live_sync import LiveSyncWorker
+
+    watching = []
+
+    async def follow_changes(self):
+        watching.append(self)
+        await asyncio.sleep(10)
+
+    monkeypatch.setattr(LiveSyncWorker, "_follow_changes", follow_changes)
+    workers = [LiveSyncWorker(debounce_seconds=0.1, max_batch=10, chunk_size=10, lease_seconds=0.3) for _ in range(2)]
+    for worker in workers:
+        worker.start()
+    await asyncio.sleep(0.5)
+
+    assert len(watching) == 1
+    for worker in workers:
+        await worker.stop()
+
+
+@pytest.mark.asyncio
+async def test_live_sync_worker_survives_mongo_errors(test_db, monkeypatch):
+    from pymongo.errors import ServerSelectionTimeoutError
+    from app.services import sheet_locks
+    from app.services.live_sync import LiveSyncWorker
+
+    failures = [ServerSelectionTimeoutError("no servers")]
+    original_acquire = sheet_locks.acquire_sheet_lock
+    watching = asyncio.Event()
+
+    async def flaky_acquire(*args):
+        if failures:
+            raise failures.pop()
+        return await original_acquire(*args)
+
+    async def follow_changes(self):
+        watching.set()
+        await asyncio.sleep(10)
+
+    monkeypatch.setattr(sheet_locks, "acquire_sheet_lock", flaky_acquire)
+    monkeypatch.setattr(LiveSyncWorker, "_follow_changes", follow_changes)
+    worker = LiveSyncWorker(debounce_seconds=0.1, max_batch=10, chunk_size=10, lease_seconds=0.3)
+    worker.start()
+
+    await asyncio.wait_for(watching.wait(), 5)
+    await worker.stop()
+
+
+@pytest.mark.asyncio
+async def test_live_sync_catches_up_after_sheets_errors(async_client: AsyncClient, test_db, mock_auth_user, sheets_emulator):
+    from app.config import settings
+    from app.services.live_sync import live_sync_worker
+
+    await test_db.authenticated_users.insert_one(mock_auth_user)
+    spreadsheet = sheets_emulator.create_spreadsheet()
+    sheet_id = spreadsheet.spreadsheet_id
+    headers = {"Authorization": f"Bearer {create_session_token(mock_auth_user['email'])}"}
+    await test_db.users.insert_one({
+        "name": "First", "email": "first@example.com", "role": "User", "created_at": datetime(2025, 1, 1)
+    })
+    await async_client.post(f"/sync/{sheet_id}/to-cloud?mode=incremental", headers=headers)
+    await async_client.post(f"/sync/{sheet_id}/live", headers=headers)
+
+    user = {"name": "Second", "email": "second@example.com", "role": "User", "created_at": datetime.utcnow()}
+    user["_id"] = (await test_db.users.insert_one(user)).inserted_id
+
+    sheets_emulator.fail_next(settings.sheets_max_retries + 1, status=503)
+    await live_sync_worker.flush(test_db, {user["_id"]: user})
+
+    assert await test_db.sheet_sync_state.find_one({"_id": sheet_id}) is not None
+    assert (await test_db.live_sync_sheets.find_one({"_id": sheet_id}))["catch_up"] is True
+
+    await live_sync_worker.flush(test_db, {})
+
+    assert "catch_up" not in await test_db.live_sync_sheets.find_one({"_id": sheet_id})
+    assert spreadsheet.read("Users!C3") == [["second@example.com"]]
+
+
+@pytest.mark.asyncio
+async def test_background_sync_job(async_client: AsyncClient, test_db, mock_auth_user, sheets_emulator):
+    from app.services.sync_jobs import sync_job_worker
+
+    await test_db.authenticated_users.insert_one(mock_auth_user)
+    spreadsheet = sheets_emulator.create_spreadsheet()
+    headers = {"Authorization": f"Bearer {create_session_token(mock_auth_user['email'])}"}
+    await test_db.users.insert_one({
+        "name": "Queued", "email": "queued@example.com", "role": "User", "created_at": datetime.utcnow()
+    })
+
+    response = await async_client.post(
+        f"/sync/{spreadsheet.spreadsheet_id}/to-cloud?mode=stream&background=true",
+        headers=headers
+    )
+    assert response.status_code == 202
+    job_id = response.json()["job_id"]
+
+    status = await async_client.get(f"/sync/jobs/{job_id}", headers=headers)
+    assert status.json()["status"] == "queued"
+
+    assert await sync_job_worker.process_next() is True
+
+    status = await async_client.get(f"/sync/jobs/{job_id}", headers=headers)
+    data = status.json()
+    assert data["status"] == "succeeded"
+    assert data["result"]["synced_count"] == 1
+    assert data["progress"] == {"rows_written": 1}
+    assert spreadsheet.read("Users!C2") == [["queued@example.com"]]
+
+
+@pytest.mark.asyncio
+async def test_sync_jobs_for_same_sheet_run_one_at_a_time(test_db):
+    from app.services.sheet_locks import acquire_sheet_lock
+    from app.services.sync_jobs import JOB_TO_CLOUD, sync_job_worker, enqueue_job
+
+    first = await enqueue_job(JOB_TO_CLOUD, "owner@example.com", "sheet-1", {"mode": "full"})
+    await enqueue_job(JOB_TO_CLOUD, "owner@example.com", "sheet-1", {"mode": "full"})
+
+    claimed = await sync_job_worker.claim_job(test_db)
+    assert claimed["_id"] == first["_id"]
+    assert await acquire_sheet_lock(test_db, "sheet-1", str(claimed["_id"]), 60) is True
+
+    assert await sync_job_worker.claim_job(test_db) is None
+
+
+@pytest.mark.asyncio
+async def test_inline_sync_returns_409_while_sheet_is_locked(async_client: AsyncClient, test_db, mock_auth_user, sheets_emulator):
+    from datetime import timedelta
+
+    await test_db.authenticated_users.insert_one(mock_auth_user)
+    spreadsheet = sheets_emulator.create_spreadsheet()
+    headers = {"Authorization": f"Bearer {create_session_token(mock_auth_user['email'])}"}
+    await test_db.sync_locks.insert_one({
+        "_id": spreadsheet.spreadsheet_id, "owner": "other", "expires_at": datetime.utcnow() + timedelta(minutes=1)
+    })
+
+    for direction in ("to-cloud", "from-cloud"):
+        response = await async_client.post(f"/sync/{spreadsheet.spreadsheet_id}/{direction}", headers=headers)
+        assert response.status_code == 409
+    assert sheets_emulator.calls == []
+
+
+@pytest.mark.asyncio
+async def test_sheet_lock_aborts_work_once_lost(test_db):
+    from app.services.sheet_locks import SheetLockLost, sheet_lock
+
+    with pytest.raises(SheetLockLost):
+        async with sheet_lock(test_db, "sheet-lost", lease_seconds=0.15):
+            await test_db.sync_locks.update_one({"_id": "sheet-lost"}, {"$set": {"owner": "thief"}})
+            await asyncio.sleep(1)
+
+    assert (await test_db.sync_locks.find_one({"_id": "sheet-lost"}))["owner"] == "thief"
+
+
+@pytest.mark.asyncio
+async def test_sync_job_aborts_after_losing_its_lease(test_db, monkeypatch):
+    from app.services import sync_jobs
+
+    worker = sync_jobs.SyncJobWorker(concurrency=1, lease_seconds=0.15, poll_seconds=1, max_attempts=3)
+    job = await sync_jobs.enqueue_job(sync_jobs.JOB_TO_CLOUD, "owner@example.com", "sheet-1", {"mode": "full"})
+
+    async def slow_job(db, job, on_progress):
+        await db.sync_jobs.update_one({"_id": job["_id"]}, {"$set": {"lease_owner": "other-worker"}})
+        await asyncio.sleep(5)
+        return {}
+
+    monkeypatch.setattr(sync_jobs, "run_job", slow_job)
+
+    started = time.monotonic()
+    assert await worker.process_next() is True
+    assert time.monotonic() - started < 2
+    stored = await test_db.sync_jobs.find_one({"_id": job["_id"]})
+    assert stored["status"] == "running"
+    assert stored["lease_owner"] == "other-worker"
+
+
+@pytest.mark.asyncio
+async def test_metrics_endpoint_reports_http_and_sheets_calls(async_client: AsyncClient, test_db, mock_auth_user, sheets_emulator):
+    await test_db.authenticated_users.insert_one(mock_auth_user)
+    spreadsheet = sheets_emulator.create_spreadsheet()
+    await test_db.users.insert_one({
+        "name": "User", "email": "user@example.com", "role": "User", "created_at": datetime(2025, 1, 1)
+    })
+
+    response = await async_client.post(
+        f"/sync/{spreadsheet.spreadsheet_id}/to-cloud",
+        headers={"Authorization": f"Bearer {create_session_token(mock_auth_user['email'])}"}
+    )
+    assert response.status_code == 200
+
+    metrics = (await async_client.get("/metrics")).text
+    assert 'http_request_duration_seconds_count{method="POST",route="/sync/{sheet_id}/to-cloud",status="200"}' in metrics
+    assert 'sheets_api_calls_total{method="sheets.spreadsheets.values.update",status="200"}' in metrics
+    assert 'sync_rows_total{direction="to_cloud",mode="full"}' in metrics
@@ -1,7 +1,15 @@
+import csv
+import io
+import json
 import pytest
 from httpx import AsyncClient
 from datetime import datetime
 from bson import ObjectId
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from app.models import PaginatedUsers
+from app.routers.users import USERS_SORT, to_user_response
+from app.sessions import create_session_token
 
 
 @pytest.mark.asyncio
@@ -17,7 +25,7 @@ async def test_create_user(async_client: AsyncClient, test_db, mock_auth_user):
     response = await async_client.post(
         "/users",
         json=user_data,
-        headers={"Authorization": f"Bearer {mock_auth_user['email']}"}
+        headers={"Authorization": f"Bearer {create_session_token(mock_auth_user['email'])}"}
     )
 
     assert response.status_code == 201
@@ -29,6 +37,19 @@ async def test_create_user(async_client: AsyncClient, test_db, mock_auth_user):
     assert "created_at" in data
 
 
+@pytest.mark.asyncio
+async def test_created_at_matches_later_reads(async_client: AsyncClient, test_db, mock_auth_user):
+    await test_db.authenticated_users.insert_one(mock_auth_user)
+    headers = {"Authorization": f"Bearer {create_session_token(mock_auth_user['email'])}"}
+
+    created = (await async_client.post(
+        "/users", json={"name": "Stamp", "email": "stamp@example.com", "role": "User"}, headers=headers
+    )).json()
+    fetched = (await async_client.get(f"/users/{created['id']}", headers=headers)).json()
+
+    assert fetched["created_at"] == created["created_at"]
+
+
 @pytest.mark.asyncio
 async def test_get_users_pagination(async_client: AsyncClient, test_db, mock_auth_user):
     await test_db.authenticated_users.insert_one(mock_auth_user)
@@ -43,7 +64,7 @@ async def test_get_users_pagination(async_client: AsyncClient, test_db, mock_aut
 
     response = await async_client.get(
         "/users?page=1&page_size=10",
-        headers={"Authorization": f"Bearer {mock_auth_user['email']}"}
+        headers={"Authorization": f"Bearer {create_session_token(mock_auth_user['email'])}"}
     )
 
     assert response.status_code == 200
@@ -70,7 +91,7 @@ async def test_get_user_by_id(async_client: AsyncClient, test_db, mock_auth_user
 
     response = await async_client.get(
         f"/users/{user_id}",
-        headers={"Authorization": f"Bearer {mock_auth_user['email']}"}
+        headers={"Authorization": f"Bearer {create_session_token(mock_auth_user['email'])}"}
     )
 
     assert response.status_code == 200
@@ -101,7 +122,7 @@ async def test_update_user(async_client: AsyncClient, test_db, mock_auth_user):
     response = await async_client.put(
         f"/users/{user_id}",
         json=update_data,
-        headers={"Authorization": f"Bearer {mock_auth_user['email']}"}
+        headers={"Authorization": f"Bearer {create_session_token(mock_auth_user['email'])}"}
     )
 
     assert response.status_code == 200
@@ -126,7 +147,7 @@ async def test_delete_user(async_client: AsyncClient, test_db, mock_auth_user):
 
     response = await async_client.delete(
         f"/users/{user_id}",
-        headers={"Authorization": f"Bearer {mock_auth_user['email']}"}
+        headers={"Authorization": f"Bearer {create_session_token(mock_auth_user['email'])}"}
     )
 
     assert response.status_code == 204
@@ -156,7 +177,7 @@ async def test_create_user_duplicate_email(async_client: AsyncClient, test_db, m
     response = await async_client.post(
         "/users",
         json=duplicate_user,
-        headers={"Authorization": f"Bearer {mock_auth_user['email']}"}
+        headers={"Authorization": f"Bearer {create_session_token(mock_auth_user['email'])}"}
     )
 
     assert response.status_code == 400
@@ -168,3 +189,344 @@ async def test_unauthorized_access(async_client: AsyncClient):
     response = await async_client.get("/users")
 
     assert response.status_code == 401
+
+
+@pytest.mark.asyncio
+async def test_get_users_cursor_pagination(async_client: AsyncClient, test_db, mock_auth_user):
+    await test_db.authenticated_users.insert_one(mock_auth_user)
+
+    created_at = datetime.utcnow().replace(microsecond=0)
+    for i in range(15):
+        await test_db.users.insert_one({
+            "name": f"User {i}",
+            "email": f"user{i}@example.com",
+            "role": "User",
+            "created_at": created_at
+        })
+
+    seen = []
+    cursor = None
+    while True:
+        url = "/users?paginate=cursor&page_size=4"
+        if cursor:
+            url += f"&cursor={cursor}"
+        response = await async_client.get(url, headers={"Authorization": f"Bearer {create_session_token(mock_auth_user['email'])}"})
+        assert response.status_code == 200
+        data = response.json()
+        assert data["total"] == 15
+        seen.extend(user["id"] for user in data["users"])
+        cursor = data["next_cursor"]
+        if not cursor:
+            break
+
+    assert len(seen) == 15
+    assert len(set(seen)) == 15
+
+    response = await async_client.get(
+        "/users?cursor=not-a-cursor",
+        headers={"Authorization": f"Bearer {create_session_token(mock_auth_user['email'])}"}
+    )
+    assert response.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_get_users_fast_path_matches_model_serialization(async_client: AsyncClient, test_db, mock_auth_user):
+    await test_db.authenticated_users.insert_one(mock_auth_user)
+
+    await test_db.users.insert_many([
+        {"name": "Zoë Ångström", "email": "zoe@example.com", "role": "Développeur",
+         "created_at": datetime(2024, 5, 1, 12, 30, 15, 123000), "updated_at": datetime(2024, 5, 1)},
+        {"name": "Plain", "email": "plain@example.com", "role": "User",
+         "created_at": datetime(2024, 5, 1, 12, 0, 0)}
+    ])
+    headers = {"Authorization": f"Bearer {create_session_token(mock_auth_user['email'])}"}
+
+    users = await test_db.users.find({}).sort(USERS_SORT).to_list(length=None)
+    expected = JSONResponse(content=jsonable_encoder(PaginatedUsers(
+        users=[to_user_response(user) for user in users],
+        total=2,
+        page=1,
+        page_size=10,
+        total_pages=1
+    ))).body
+
+    response = await async_client.get("/users?page=1&page_size=10", headers=headers)
+    assert response.status_code == 200
+    assert response.content == expected
+
+    response = await async_client.get(f"/users/{users[0]['_id']}", headers=headers)
+    assert response.content == JSONResponse(content=jsonable_encoder(to_user_response(users[0]))).body
+
+
+@pytest.mark.asyncio
+async def test_bulk_user_crud(async_client: AsyncClient, test_db, mock_auth_user):
+    await test_db.authenticated_users.insert_one(mock_auth_user)
+    await test_db.users.insert_one({
+        "name": "Existing",
+        "email": "existing@example.com",
+        "role": "User",
+        "created_at": datetime.utcnow()
+    })
+    headers = {"Authorization": f"Bearer {create_session_token(mock_auth_user['email'])}"}
+
+    response = await async_client.post("/users/bulk", json=[
+        {"name": "A", "email": "a@example.com", "role": "User"},
+        {"name": "Dup", "email": "existing@example.com", "role": "User"},
+        {"name": "", "email": "not-an-email", "role": "User"},
+        {"name": "B", "email": "b@example.com", "role": "Manager"}
+    ], headers=headers)
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["succeeded"] == 2
+    assert data["failed"] == 2
+    assert [item["status"] for item in data["results"]] == ["created", "error", "error", "created"]
+    assert data["results"][1]["error"] == "User with this email already exists"
+    assert await test_db.users.count_documents({}) == 3
+
+    created_ids = [data["results"][0]["id"], data["results"][3]["id"]]
+
+    response = await async_client.patch("/users/bulk", json=[
+        {"id": created_ids[0], "role": "Admin"},
+        {"id": created_ids[1], "email": "existing@example.com"},
+        {"id": str(ObjectId()), "name": "Ghost"},
+        {"id": created_ids[1]},
+        {"id": 123, "name": "Numeric"}
+    ], headers=headers)
+
+    assert response.status_code == 200
+    data = response.json()
+    assert [item["status"] for item in data["results"]] == ["updated", "error", "error", "error", "error"]
+    assert data["results"][4]["id"] == "123"
+    assert data["results"][2]["error"] == "User not found"
+    assert data["results"][3]["error"] == "No fields to update"
+    updated = await test_db.users.find_one({"_id": ObjectId(created_ids[0])})
+    assert updated["role"] == "Admin"
+
+    response = await async_client.request("DELETE", "/users/bulk", json={
+        "ids": created_ids + ["bad-id", created_ids[0]]
+    }, headers=headers)
+
+    data = response.json()
+    assert [item["status"] for item in data["results"]] == ["deleted", "deleted", "error", "error"]
+    assert await test_db.users.count_documents({}) == 1
+
+
+@pytest.mark.asyncio
+async def test_export_users(async_client: AsyncClient, test_db, mock_auth_user):
+    await test_db.authenticated_users.insert_one(mock_auth_user)
+    await test_db.users.insert_many([
+        {"name": f"User {i}", "email": f"user{i}@example.com", "role": "User",
+         "created_at": datetime(2024, 1, 1, 9, 0, i)}
+        for i in range(3)
+    ])
+    headers = {"Authorization": f"Bearer {create_session_token(mock_auth_user['email'])}"}
+
+    response = await async_client.get("/users/export?format=ndjson", headers=headers)
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert [line["email"] for line in lines] == ["user0@example.com", "user1@example.com", "user2@example.com"]
+    assert list(lines[0]) == ["id", "name", "email", "role", "created_at"]
+
+    response = await async_client.get("/users/export?format=csv", headers=headers)
+    assert response.status_code == 200
+    rows = list(csv.reader(io.StringIO(response.text)))
+    assert rows[0] == ["ID", "Name", "Email", "Role", "Created At"]
+    assert rows[1][1:] == ["User 0", "user0@example.com", "User", "2024-01-01 09:00:00"]
+    assert len(rows) == 4
+
+
+@pytest.mark.asyncio
+async def test_import_users(async_client: AsyncClient, test_db, mock_auth_user):
+    await test_db.authenticated_users.insert_one(mock_auth_user)
+    await test_db.users.insert_many([
+        {"name": "Old Name", "email": "a@example.com", "role": "User", "created_at": datetime(2024, 1, 1)},
+        {"name": "Same", "email": "b@example.com", "role": "User", "created_at": datetime(2024, 1, 1)}
+    ])
+    headers = {"Authorization": f"Bearer {create_session_token(mock_auth_user['email'])}"}
+
+    body = (
+        "ID,Name,Email,Role,Created At\n"
+        ",New Name,a@example.com,User,\n"
+        ",Same,b@example.com,User,\n"
+        ",Carol,c@example.com,Manager,\n"
+        ",Broken,not-an-email,User,\n"
+        ",Carol Again,c@example.com,Manager,\n"
+    )
+    response = await async_client.post(
+        "/users/import",
+        files={"file": ("users.csv", body.encode("utf-8"), "text/csv")},
+        headers=headers
+    )
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["processed"] == 5
+    assert data["inserted"] == 1
+    assert data["updated"] == 1
+    assert data["unchanged"] == 1
+    assert data["failed"] == 2
+    assert [error["row"] for error in data["errors"]] == [5, 6]
+    assert (await test_db.users.find_one({"email": "a@example.com"}))["name"] == "New Name"
+    assert await test_db.users.count_documents({}) == 3
+
+    body = '{"name": "Dan", "email": "d@example.com", "role": "User"}\n\nnot json\n'
+    response = await async_client.post(
+        "/users/import?format=ndjson",
+        files={"file": ("upload.txt", body.encode("utf-8"), "application/octet-stream")},
+        headers=headers
+    )
+
+    data = response.json()
+    assert data["inserted"] == 1
+    assert data["errors"][0]["row"] == 3
+
+
+@pytest.mark.asyncio
+async def test_mutation_error_codes(async_client: AsyncClient, test_db, mock_auth_user):
+    await test_db.authenticated_users.insert_one(mock_auth_user)
+    headers = {"Authorization": f"Bearer {create_session_token(mock_auth_user['email'])}"}
+
+    first = (await async_client.post("/users", json={"name": "A", "email": "a@example.com", "role": "User"}, headers=headers)).json()
+    await async_client.post("/users", json={"name": "B", "email": "b@example.com", "role": "User"}, headers=headers)
+    missing_id = str(ObjectId())
+
+    response = await async_client.put(f"/users/{first['id']}", json={"email": "b@example.com"}, headers=headers)
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Email already in use by another user"
+
+    response = await async_client.put(f"/users/{first['id']}", json={"email": "a@example.com"}, headers=headers)
+    assert response.status_code == 200
+
+    response = await async_client.put(f"/users/{missing_id}", json={"name": "X"}, headers=headers)
+    assert response.status_code == 404
+
+    response = await async_client.put(f"/users/{missing_id}", json={}, headers=headers)
+    assert response.status_code == 404
+
+    response = await async_client.put(f"/users/{first['id']}", json={}, headers=headers)
+    assert response.status_code == 400
+
+    response = await async_client.delete(f"/users/{missing_id}", headers=headers)
+    assert response.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_get_users_filters(async_client: AsyncClient, test_db, mock_auth_user):
+    await test_db.authenticated_users.insert_one(mock_auth_user)
+    await test_db.users.insert_many([
+        {"name": "alice", "email": "alice@example.com", "role": "Admin", "created_at": datetime(2024, 1, 1)},
+        {"name": "alicia", "email": "alicia@example.com", "role": "User", "created_at": datetime(2024, 2, 1)},
+        {"name": "bob", "email": "bob@example.com", "role": "User", "created_at": datetime(2024, 3, 1)},
+        {"name": "carol", "email": "carol@example.com", "role": "User", "created_at": datetime(2024, 4, 1)}
+    ])
+    headers = {"Authorization": f"Bearer {create_session_token(mock_auth_user['email'])}"}
+
+    response = await async_client.get("/users?role=User", headers=headers)
+    data = response.json()
+    assert data["total"] == 3
+    assert [user["name"] for user in data["users"]] == ["carol", "bob", "alicia"]
+
+    response = await async_client.get("/users?search=ali", headers=headers)
+    assert [user["name"] for user in response.json()["users"]] == ["alicia", "alice"]
+
+    response = await async_client.get(
+        "/users?role=User&created_after=2024-02-01T00:00:00&created_before=2024-04-01T00:00:00",
+        headers=headers
+    )
+    assert [user["name"] for user in response.json()["users"]] == ["bob", "alicia"]
+
+    response = await async_client.get("/users?role=User&paginate=cursor&page_size=2", headers=headers)
+    data = response.json()
+    assert [user["name"] for user in data["users"]] == ["carol", "bob"]
+
+    response = await async_client.get(f"/users?role=User&page_size=2&cursor={data['next_cursor']}", headers=headers)
+    data = response.json()
+    assert [user["name"] for user in data["users"]] == ["alicia"]
+    assert data["next_cursor"] is None
+
+    response = await async_client.get("/users?role=user&search=ali", headers=headers)
+    assert response.json()["users"] == []
+
+
+def test_role_filter_stays_exact_under_search_collation():
+    import re
+    from app.routers.users import SEARCH_COLLATION, build_users_filter
+
+    query, collation = build_users_filter("Dev+Ops", None, None, None)
+    assert (query, collation) == ({"role": "Dev+Ops"}, None)
+
+    query, collation = build_users_filter("Dev+Ops", "ali", None, None)
+    assert collation == SEARCH_COLLATION
+    pattern = query["role"]["$regex"]
+    assert re.search(pattern, "Dev+Ops")
+    assert not re.search(pattern, "dev+ops")
+    assert not re.search(pattern, "Dev+Ops2")
+
+
+@pytest.mark.asyncio
+async def test_role_stats(async_client: AsyncClient, test_db, mock_auth_user):
+    from app.services.user_stats import recount_roles
+
+    await test_db.authenticated_users.insert_one(mock_auth_user)
+    headers = {"Authorization": f"Bearer {create_session_token(mock_auth_user['email'])}"}
+
+    created = [
+        (await async_client.post("/users", json={"name": name, "email": f"{name}@example.com", "role": role},
+                                 headers=headers)).json()
+        for name, role in [("a", "User"), ("b", "User"), ("c", "Admin")]
+    ]
+    await async_client.put(f"/users/{created[0]['id']}", json={"role": "Admin"}, headers=headers)
+    await async_client.delete(f"/users/{created[1]['id']}", headers=headers)
+    await async_client.post("/users/bulk", json=[
+        {"name": "d", "email": "d@example.com", "role": "Manager"},
+        {"name": "dup", "email": "c@example.com", "role": "Manager"}
+    ], headers=headers)
+
+    response = await async_client.get("/users/stats", headers=headers)
+    assert response.status_code == 200
+    data = response.json()
+    assert data["total"] == 3
+    assert data["roles"] == {"Admin": 2, "Manager": 1}
+
+    await test_db.users.insert_one({"name": "e", "email": "e@example.com", "role": "User", "created_at": datetime.utcnow()})
+    await recount_roles(test_db)
+
+    data = (await async_client.get("/users/stats", headers=headers)).json()
+    assert data["total"] == 4
+    assert data["roles"] == {"Admin": 2, "Manager": 1, "User": 1}
+    assert data["reconciled_at"] is not None
+
+
+@pytest.mark.asyncio
+async def test_conditional_get_returns_304(async_client: AsyncClient, test_db, mock_auth_user):
+    await test_db.authenticated_users.insert_one(mock_auth_user)
+    headers = {"Authorization": f"Bearer {create_session_token(mock_auth_user['email'])}"}
+
+    created = (await async_client.post(
+        "/users", json={"name": "A", "email": "a@example.com", "role": "User"}, headers=headers
+    )).json()
+
+    response = await async_client.get(f"/users/{created['id']}", headers=headers)
+    etag = response.headers["etag"]
+    assert etag.startswith('W/"')
+
+    response = await async_client.get(f"/users/{created['id']}", headers={**headers, "If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.content == b""
+
+    list_response = await async_client.get("/users", headers=headers)
+    list_etag = list_response.headers["etag"]
+    response = await async_client.get("/users", headers={**headers, "If-None-Match": list_etag})
+    assert response.status_code == 304
+
+    await async_client.put(f"/users/{created['id']}", json={"name": "B"}, headers=headers)
+
+    response = await async_client.get(f"/users/{created['id']}", headers={**headers, "If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["etag"] != etag
+
+    response = await async_client.get("/users", headers={**headers, "If-None-Match": list_etag})
+    assert response.status_code == 200
+    assert response.json()["users"][0]["name"] == "B"